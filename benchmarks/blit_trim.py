@@ -0,0 +1,57 @@
+"""
+Blit benchmark for alpha-trimmed sprite frames.
+
+Draws every komodo and egg frame with the original full 250x250 surfaces
+and with the trimmed surfaces, and reports the time per blit and the
+pixel memory of each variant.
+
+Run from the repository root:
+    python benchmarks/blit_trim.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+
+ROUNDS = 200
+
+
+def load_sets(trim):
+    frame_sets = []
+    for pattern, count in list(main.SPRITE_FRAME_SETS.values()) + [(main.EGG_FRAME_PATTERN, main.EGG_FRAME_COUNT)]:
+        frames = main.FrameSet(main.load_image(pattern.format(i), main.SPRITE_FRAME_SIZE) for i in range(1, count + 1))
+        frame_sets.append(main.trim_frame_set(frames) if trim else frames)
+    return frame_sets
+
+
+def time_blits(screen, frame_sets):
+    frames = [frame for frame_set in frame_sets for frame in frame_set]
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for frame in frames:
+            screen.blit(frame, (75, 275))
+    elapsed = time.perf_counter() - start
+    return elapsed / (ROUNDS * len(frames))
+
+
+def main_benchmark():
+    pygame.init()
+    screen = pygame.display.set_mode((main.SCREEN_WIDTH, main.SCREEN_HEIGHT))
+    for label, trim in (('full', False), ('trimmed', True)):
+        frame_sets = load_sets(trim)
+        per_blit = time_blits(screen, frame_sets)
+        pixels = sum(frame.get_width() * frame.get_height() for frame_set in frame_sets for frame in frame_set)
+        memory = sum(main.surface_bytes(frame) for frame_set in frame_sets for frame in frame_set)
+        print(f"{label:>8}: {per_blit * 1e6:7.1f} us/blit, {pixels:>9} px, {memory / 1024:8.0f} KB")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,77 @@
+"""
+Heading-aligned fly benchmark.
+
+Spawns 1k-4k flies and times a frame (FlySprite.update plus a RenderQueue
+flush) with unrotated frames, with the pre-rotated heading cache, and with
+pygame.transform.rotate called per fly per frame for comparison.
+
+Run from the repository root:
+    python benchmarks/fly_headings.py
+"""
+import math
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+
+FRAMES = 100
+WARMUP_FRAMES = 10
+FLY_COUNTS = (1000, 2000, 4000)
+
+
+class RotateEveryFrameFly(main.FlySprite):
+    """Rotates the current frame on every update, the approach the cache replaces."""
+    def update(self, frame_scale=1.0):
+        super().update(frame_scale)
+        self.image = pygame.transform.rotate(self.frames[self.current_frame], -math.degrees(self.direction))
+
+
+def build_flies(frames, count, fly_class=main.FlySprite, rotated=True):
+    group = pygame.sprite.Group()
+    for index in range(count):
+        x = 50 + index * 37 % (main.SCREEN_WIDTH - 100)
+        y = main.FLY_BOUNDARY_TOP + 20 + index * 53 % (main.FLY_BOUNDARY_BOTTOM - main.FLY_BOUNDARY_TOP - 40)
+        fly = fly_class(frames, x, y, 3)
+        if not rotated:
+            fly.rotations = None
+        group.add(fly)
+    return group
+
+
+def time_frames(screen, queue, flies):
+    for _ in range(WARMUP_FRAMES):
+        flies.update(1.0)
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        flies.update(1.0)
+        queue.add_group(flies, main.LAYER_FLIES)
+        queue.flush(screen)
+    return (time.perf_counter() - start) / FRAMES
+
+
+def main_benchmark():
+    pygame.init()
+    screen = pygame.display.set_mode((main.SCREEN_WIDTH, main.SCREEN_HEIGHT))
+    game = main.Game()
+    frames = game.load_fly_frames()
+    queue = main.RenderQueue()
+
+    for count in FLY_COUNTS:
+        unrotated = time_frames(screen, queue, build_flies(frames, count, rotated=False))
+        cached = time_frames(screen, queue, build_flies(frames, count))
+        per_frame = time_frames(screen, queue, build_flies(frames, count, RotateEveryFrameFly, rotated=False))
+        print(f"{count:>5} flies: unrotated {unrotated * 1000:6.2f} ms, "
+              f"rotation cache {cached * 1000:6.2f} ms ({cached / unrotated:4.2f}x), "
+              f"rotate per frame {per_frame * 1000:6.2f} ms ({per_frame / unrotated:4.2f}x)")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main_benchmark()
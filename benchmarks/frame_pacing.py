@@ -0,0 +1,71 @@
+"""
+CPU usage per screen with and without adaptive frame pacing.
+
+Runs the real update/draw/flip loop on each screen for a few seconds,
+once at a fixed 60 FPS and once with FramePacer, and prints the CPU time
+used as a percentage of one core.
+
+Run from the repository root:
+    python benchmarks/frame_pacing.py
+"""
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+
+SECONDS = 3
+
+
+def enter_screen(game, name):
+    if name == 'menu':
+        game.game_state = main.MENU
+        return
+    game.reset_game()
+    if name == 'playing':
+        game.pet_age = 5
+        game.last_age_update = pygame.time.get_ticks()
+    elif name == 'game_over':
+        game.game_state = main.GAME_OVER
+        game.create_tombstone()
+        game.explosion_sprites.empty()
+
+
+def run_screen(screen, game, logo_image, buttons, name, pacing):
+    pacer = main.FramePacer(pygame.time.Clock(), enabled=pacing)
+    enter_screen(game, name)
+    end_time = pygame.time.get_ticks() + SECONDS * 1000
+    frames = 0
+    while pygame.time.get_ticks() < end_time:
+        pacer.get_events()
+        game.update(pacer.frame_scale)
+        main.draw_screen(screen, game, logo_image, *buttons)
+        pygame.display.flip()
+        pacer.tick(game.activity_level(), name)
+        frames += 1
+    return pacer.cpu_report()[name], frames / SECONDS
+
+
+def main_benchmark():
+    pygame.init()
+    screen = pygame.display.set_mode((main.SCREEN_WIDTH, main.SCREEN_HEIGHT))
+    logo_image = main.load_and_scale_logo('graphics/startPageLogo.png')
+    buttons = (main.create_menu_buttons(), main.create_game_over_buttons())
+    game = main.Game()
+    game.load_assets()
+    
+    for name in ('menu', 'egg', 'playing', 'game_over'):
+        fixed_cpu, fixed_fps = run_screen(screen, game, logo_image, buttons, name, False)
+        paced_cpu, paced_fps = run_screen(screen, game, logo_image, buttons, name, True)
+        print(f"{name:>9}: fixed {fixed_cpu:5.1f}% CPU @ {fixed_fps:4.0f} FPS, "
+              f"paced {paced_cpu:5.1f}% CPU @ {paced_fps:4.0f} FPS")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,82 @@
+"""
+Event processing benchmark under synthetic high-rate mouse input.
+
+Feeds bursts of MOUSEMOTION events (as a high-rate mouse or touchscreen
+would queue them) through the original per-event loop and through
+InputHandler, which collapses motion to the latest position per frame.
+
+Run from the repository root:
+    python benchmarks/input_events.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+
+FRAMES = 500
+EVENTS_PER_FRAME = (1, 10, 50)
+
+
+def legacy_process(events, game, play_button, quit_button, retry_button, exit_button):
+    """The per-event if/elif loop main() used before InputHandler."""
+    for event in events:
+        if event.type == pygame.MOUSEMOTION:
+            mouse_pos = event.pos
+            if game.game_state == main.MENU:
+                play_button.is_hovered(mouse_pos)
+                quit_button.is_hovered(mouse_pos)
+            elif game.game_state == main.GAME_OVER:
+                retry_button.is_hovered(mouse_pos)
+                exit_button.is_hovered(mouse_pos)
+            if game.game_state == main.PLAYING:
+                game.handle_mouse_motion(mouse_pos)
+
+
+def make_bursts(count):
+    return [
+        [pygame.event.Event(pygame.MOUSEMOTION, pos=(100 + (frame + i) % 200, 300), rel=(1, 0), buttons=(1, 0, 0))
+         for i in range(count)]
+        for frame in range(FRAMES)
+    ]
+
+
+def time_frames(process, bursts):
+    start = time.perf_counter()
+    for events in bursts:
+        process(events)
+    return (time.perf_counter() - start) / len(bursts)
+
+
+def main_benchmark():
+    pygame.init()
+    pygame.display.set_mode((main.SCREEN_WIDTH, main.SCREEN_HEIGHT))
+    menu_buttons = main.create_menu_buttons()
+    game_over_buttons = main.create_game_over_buttons()
+    game = main.Game()
+    game.load_assets()
+    handler = main.InputHandler(game, menu_buttons, game_over_buttons)
+    
+    for state, label in ((main.MENU, 'menu'), (main.PLAYING, 'dragging')):
+        game.game_state = state
+        if state == main.PLAYING:
+            game.reset_game()
+            game.dragging_fly = next(iter(game.fly_sprites))
+            game.dragging_fly.start_drag()
+        for count in EVENTS_PER_FRAME:
+            bursts = make_bursts(count)
+            legacy = time_frames(lambda events: legacy_process(events, game, *menu_buttons, *game_over_buttons), bursts)
+            pipeline = time_frames(handler.process, bursts)
+            print(f"{label:>8} {count:>3} events/frame: legacy {legacy * 1e6:7.1f} us, "
+                  f"pipeline {pipeline * 1e6:7.1f} us ({legacy / pipeline:4.1f}x)")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,46 @@
+"""
+Particle system throughput benchmark.
+
+Keeps a steady population of particles alive and times one update plus
+one draw per frame, the work ParticleSystem does every frame in the game.
+
+Run from the repository root (requires NumPy):
+    python benchmarks/particles.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+
+FRAMES = 120
+POPULATIONS = (1000, 10000, 30000, 50000)
+
+
+def main_benchmark():
+    pygame.init()
+    screen = pygame.display.set_mode((main.SCREEN_WIDTH, main.SCREEN_HEIGHT))
+    effect = main.PARTICLE_EFFECTS['dust']
+    area = screen.get_rect()
+    for population in POPULATIONS:
+        particles = main.ParticleSystem(population, effect['palette'], effect['size'])
+        # Lifetimes long enough that the population stays full for the whole run
+        particles.spray(area, population, (0, 0), 30, (60, 60))
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            particles.update(1 / main.TARGET_FPS)
+            particles.draw(screen)
+        per_frame = (time.perf_counter() - start) / FRAMES
+        print(f"{population:>6} particles: {per_frame * 1000:6.2f} ms/frame "
+              f"({per_frame * main.TARGET_FPS * 100:5.1f}% of a 60 FPS frame)")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main_benchmark()
@@ -0,0 +1,83 @@
+"""
+Render path benchmark for many on-screen entities.
+
+Lays out a grid of pet tiles, each a pet sprite with two flies in their own
+groups (as Game keeps them), and times drawing the frame with one
+Group.draw call per group versus one RenderQueue flush.
+
+Run from the repository root:
+    python benchmarks/render_queue.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+
+FRAMES = 200
+ENTITY_COUNTS = (1, 50, 500)
+TILE_SIZE = 48
+
+
+def build_tiles(game, entity_count):
+    """Return per-tile groups holding entity_count sprites in total."""
+    pet_frames = [game.frame_store.get_variant(frame, 'scale', (TILE_SIZE, TILE_SIZE)) for frame in game.teenage_frames]
+    fly_frames = [pygame.transform.scale(frame, (16, 16)) for frame in game.fly_frames]
+    columns = main.SCREEN_WIDTH // TILE_SIZE
+    groups = []
+    for index in range(entity_count):
+        tile = index // 3
+        x = (tile % columns) * TILE_SIZE + TILE_SIZE // 2
+        y = (tile // columns) % (main.SCREEN_HEIGHT // TILE_SIZE) * TILE_SIZE + TILE_SIZE // 2
+        if index % 3 == 0:
+            sprite = main.AnimatedSprite(pet_frames, x, y)
+            sprite.current_frame = tile % len(pet_frames)
+        else:
+            sprite = main.AnimatedSprite(fly_frames, x + (index % 3) * 8 - 12, y - 12)
+        sprite.image = sprite.frames[(tile + index) % len(sprite.frames)]
+        groups.append((pygame.sprite.Group(sprite), main.LAYER_PET if index % 3 == 0 else main.LAYER_FLIES))
+    return groups
+
+
+def time_frames(draw):
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        draw()
+    return (time.perf_counter() - start) / FRAMES
+
+
+def main_benchmark():
+    pygame.init()
+    screen = pygame.display.set_mode((main.SCREEN_WIDTH, main.SCREEN_HEIGHT))
+    game = main.Game()
+    game.load_assets()
+    queue = main.RenderQueue()
+    
+    def draw_groups():
+        game.background.draw(screen)
+        for group, _ in groups:
+            group.draw(screen)
+    
+    def draw_queue():
+        queue.add_callback(game.background.draw, main.LAYER_BACKGROUND)
+        for group, layer in groups:
+            queue.add_group(group, layer)
+        queue.flush(screen)
+    
+    for entity_count in ENTITY_COUNTS:
+        groups = build_tiles(game, entity_count)
+        per_group = time_frames(draw_groups)
+        batched = time_frames(draw_queue)
+        print(f"{entity_count:>4} entities: Group.draw {per_group * 1000:6.3f} ms, "
+              f"RenderQueue {batched * 1000:6.3f} ms ({per_group / batched:4.2f}x)")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main_benchmark()
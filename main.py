@@ -1,10 +1,34 @@
+import time
+IMPORT_START = time.perf_counter()  # Start of the startup timeline
+
 import pygame
 import os
 import random
 import math
 import logging
+import functools
+import json
+import threading
+import queue
+import sqlite3
+import struct
+import zlib
+import atexit
+import gc
+import sys
+import tracemalloc
+import cProfile
+import signal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import OrderedDict, deque, namedtuple
 from sys import exit
 
+# NumPy is optional; without it the particle effects are disabled
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -17,6 +41,9 @@ logger = logging.getLogger(__name__)
 SCREEN_WIDTH = 400
 SCREEN_HEIGHT = 600
 
+# Frame rate settings
+TARGET_FPS = 60
+
 # Game states
 MENU = 0
 PLAYING = 1
@@ -40,6 +67,14 @@ TITLE_FONT = None
 # Background settings
 BACKGROUND_SCROLL_SPEED = 1  # Pixels per frame - adjust for faster/slower scrolling
 
+# Parallax layers, back to front. speed multiplies BACKGROUND_SCROLL_SPEED; opaque layers
+# are stored without alpha. Layers after the first are optional and skipped if missing.
+ParallaxLayer = namedtuple('ParallaxLayer', 'path speed opaque')
+PARALLAX_LAYERS = [
+    ParallaxLayer('graphics/background.png', 1.0, True),
+    ParallaxLayer('graphics/parallax/near.png', 2.0, False),
+]
+
 # Asset paths
 ASSET_PATHS = {
     'background': 'graphics/background.png',
@@ -48,6 +83,210 @@ ASSET_PATHS = {
     'tombstone': 'graphics/tombstone.png'  # Added the tombstone path
 }
 
+# Sprite frame settings
+SPRITE_FRAME_SIZE = (250, 250)  # All komodo and egg frames are scaled to this size
+FLY_SHEET_PATH = 'graphics/fly.png'
+FLY_HEADINGS = 32  # Pre-rotated fly frames per animation frame (0 keeps flies unrotated)
+EGG_FRAME_PATTERN = 'graphics/egg/komodoEgg{}.png'
+EGG_FRAME_COUNT = 3
+
+# Komodo frame sets: Game attribute -> (path pattern, frame count)
+SPRITE_FRAME_SETS = {
+    'teenage_frames': ('graphics/midkomodowalking/komodoWalking{}.png', 4),
+    'baby_komodo_frames': ('graphics/Baby/babyKomodo{}.png', 4),
+    'old_komodo_frames': ('graphics/oldkomodo/oldKomodo{}.png', 6),
+    'komodo_eating_frames': ('graphics/midkomodoeating/komodoEating{}.png', 8),
+    'baby_komodo_eating_frames': ('graphics/baby/babyKomodoEating{}.png', 4),
+    'old_komodo_eating_frames': ('graphics/oldKomodoEating{}.png', 2),
+}
+
+# Life stages, youngest first. sprite_attr names the Game attribute holding the stage's sprite.
+LifeStage = namedtuple('LifeStage', 'name min_age sprite_attr fly_speed max_flies hunger_interval')
+LIFE_STAGES = [
+    LifeStage('egg', 0, 'egg_sprite', fly_speed=3, max_flies=3, hunger_interval=1000),
+    LifeStage('baby', 1, 'baby_komodo_sprite', fly_speed=3, max_flies=3, hunger_interval=1000),
+    LifeStage('teen', 10, 'teenage_sprite', fly_speed=4.5, max_flies=2, hunger_interval=1000),
+    LifeStage('old', 20, 'old_komodo_sprite', fly_speed=6, max_flies=1, hunger_interval=1000),
+]
+# Index into LIFE_STAGES for ages 0..20 (older ages use the last entry)
+LIFE_STAGE_BY_AGE = [max(i for i, stage in enumerate(LIFE_STAGES) if age >= stage.min_age)
+                     for age in range(LIFE_STAGES[-1].min_age + 1)]
+
+# Life stage -> frame set attributes, used for memory accounting
+LIFE_STAGE_FRAME_SETS = {
+    'egg': ['egg_frames'],
+    'baby': ['baby_komodo_frames', 'baby_komodo_eating_frames'],
+    'teen': ['teenage_frames', 'komodo_eating_frames'],
+    'old': ['old_komodo_frames', 'old_komodo_eating_frames'],
+}
+
+# Crop komodo and egg frames to their opaque area at load time
+TRIM_SPRITE_FRAMES = True
+
+# Frame store settings
+FRAME_VARIANT_BUDGET = 8 * 1024 * 1024  # Bytes of derived frames (flips, tints, scales) kept cached
+
+# Hot reload settings (development mode, enable with KOMODO_HOT_RELOAD=1)
+HOT_RELOAD_ENABLED = os.environ.get('KOMODO_HOT_RELOAD') == '1'
+HOT_RELOAD_STATS_PER_FRAME = 4  # Files checked for changes each frame
+HOT_RELOAD_LOADS_PER_FRAME = 1  # Changed files reloaded each frame
+
+# Particle settings (KOMODO_AMBIENT selects dust, rain or none)
+PARTICLES_ENABLED = os.environ.get('KOMODO_PARTICLES', '1') == '1'
+PARTICLE_BUDGET = 20000  # Max live event particles (explosions)
+AMBIENT_PARTICLE_BUDGET = 4000  # Max live ambient particles
+EXPLOSION_VARIANTS = 3  # Pre-drawn explosion sprites per quality level, used without particles
+AMBIENT_EFFECT = os.environ.get('KOMODO_AMBIENT', 'dust')
+PARTICLE_EFFECTS = {
+    # Bursts: count per burst, speed in px/s, lifetime in seconds, gravity in px/s^2
+    'explosion': {
+        'palette': [(255, 255, 255), (255, 255, 0), (255, 165, 0), (255, 69, 0), (255, 0, 0)],
+        'size': (4, 4), 'count': 400, 'speed': (40, 240), 'lifetime': (0.3, 0.9), 'gravity': 150,
+    },
+    # Ambient: rate in particles/s, velocity and jitter in px/s
+    'dust': {
+        'palette': [(255, 240, 210), (235, 215, 180), (210, 190, 160)],
+        'size': (2, 2), 'rate': 40, 'velocity': (-60, -4), 'jitter': 10, 'lifetime': (2.0, 5.0),
+    },
+    'rain': {
+        'palette': [(200, 215, 255), (160, 185, 235)],
+        'size': (1, 6), 'rate': 300, 'velocity': (-40, 480), 'jitter': 20, 'lifetime': (1.4, 1.6),
+    },
+}
+# Where ambient particles appear: dust over the beach, rain from above the screen
+AMBIENT_EMIT_RECTS = {
+    'dust': pygame.Rect(0, SCREEN_HEIGHT // 2, SCREEN_WIDTH + 60, SCREEN_HEIGHT // 2),
+    'rain': pygame.Rect(0, -20, SCREEN_WIDTH + 120, 20),
+}
+
+# Day/night lighting (disable with KOMODO_DAY_NIGHT=0). Keyframes are (phase of the day,
+# RGB multiply, RGB add); each life starts at phase 0. The day is split into LIGHTING_BUCKETS
+# fixed tints so tinted frames can be cached.
+DAY_NIGHT_ENABLED = os.environ.get('KOMODO_DAY_NIGHT', '1') == '1'
+DAY_LENGTH = 120000  # ms per full day
+LIGHTING_BUCKETS = 8
+LIGHTING_KEYFRAMES = [
+    (0.0, (255, 255, 255), (0, 0, 0)),  # Day
+    (0.35, (255, 255, 255), (0, 0, 0)),
+    (0.5, (255, 190, 150), (25, 10, 0)),  # Dusk
+    (0.7, (80, 90, 150), (0, 0, 12)),  # Night
+    (0.9, (230, 200, 210), (15, 8, 8)),  # Dawn
+    (1.0, (255, 255, 255), (0, 0, 0)),
+]
+NEUTRAL_LIGHT = ((255, 255, 255), (0, 0, 0))
+LIGHTING_CACHE_BUDGET = 32 * 1024 * 1024  # Bytes of tinted frames kept cached
+
+# Render layers, drawn from lowest to highest
+LAYER_BACKGROUND = 0
+LAYER_AMBIENT = 1
+LAYER_PET = 2
+LAYER_FLIES = 3
+LAYER_EFFECTS = 4
+
+# Display settings
+# KOMODO_DISPLAY selects how the 400x600 logical frame reaches the screen:
+#   window - a 400x600 window (default)
+#   scaled - pygame.SCALED, SDL scales the finished frame once per frame
+#   native - a KOMODO_RESOLUTION (e.g. 1920x1080) window drawn with assets
+#            pre-scaled once per output resolution
+DISPLAY_MODE = os.environ.get('KOMODO_DISPLAY', 'window')
+DISPLAY_RESOLUTION = os.environ.get('KOMODO_RESOLUTION')
+DISPLAY_FULLSCREEN = os.environ.get('KOMODO_FULLSCREEN') == '1'
+DISPLAY_VSYNC = os.environ.get('KOMODO_VSYNC') == '1'  # Present with pygame.SCALED | vsync (window and scaled modes)
+NATIVE_ASSET_BUDGET = 64 * 1024 * 1024  # Bytes of pre-scaled assets kept per output resolution
+
+# Late latch: move a dragged fly to the newest pointer position right before drawing (KOMODO_LATE_LATCH=0 to turn off)
+LATE_LATCH = os.environ.get('KOMODO_LATE_LATCH', '1') == '1'
+
+# Camera settings: mouse wheel or pinch zooms, right-drag pans (window and scaled display modes)
+CAMERA_ENABLED = os.environ.get('KOMODO_CAMERA', '1') == '1'
+CAMERA_ZOOM_RANGE = (0.25, 4.0)
+CAMERA_ZOOM_STEP = 1.25  # Zoom factor per mouse wheel notch
+CAMERA_PINCH_GAIN = 4.0  # Zoom change per unit of pinch distance
+CAMERA_MAX_MIP_LEVEL = 4  # Smallest mip is 1/16 of the frame
+CAMERA_MIP_BUDGET = 16 * 1024 * 1024  # Bytes of mip levels kept cached
+
+# Frame pacing settings (disable with KOMODO_FRAME_PACING=0)
+FRAME_PACING_ENABLED = os.environ.get('KOMODO_FRAME_PACING', '1') == '1'
+PACE_ACTIVE = 0  # Something scrolls or animates every frame
+PACE_AMBIENT = 1  # Only small sprites move (egg stage, tombstone)
+PACE_STATIC = 2  # Nothing changes without input (menu)
+PACER_FPS = {PACE_ACTIVE: TARGET_FPS, PACE_AMBIENT: 30, PACE_STATIC: 4}
+PACER_INPUT_HOLD = 2000  # Run at full rate for this many ms after any input
+PACER_IDLE_WAIT = 1000 // PACER_FPS[PACE_STATIC]  # Max ms to block waiting for input on static screens
+
+# Metrics settings: export Prometheus text to KOMODO_METRICS_FILE and/or
+# serve it on 127.0.0.1:KOMODO_METRICS_PORT/metrics
+METRICS_FILE = os.environ.get('KOMODO_METRICS_FILE')
+METRICS_PORT = os.environ.get('KOMODO_METRICS_PORT')  # Checked by MetricsExporter
+METRICS_EXPORT_INTERVAL = 10  # Seconds between metrics file rewrites
+METRICS_WINDOW = 1024  # Recent frames used for frame-time percentiles
+METRICS_QUANTILES = (0.5, 0.9, 0.99)
+
+# Threaded mode: run input and Game.update on a simulation thread at a fixed rate
+THREADED_SIMULATION = os.environ.get('KOMODO_THREADED', '0') == '1'
+SIMULATION_RATE = TARGET_FPS  # Steps per second
+
+# Lifetime records: every life is stored in this SQLite database ('' turns recording off)
+RECORDS_DB = os.environ.get('KOMODO_RECORDS_DB', 'komodo_records.db')
+RECORDS_BATCH_SIZE = 64  # Rows written per transaction at most
+
+# Frame profiler: press PROFILE_HOTKEY, send SIGUSR1 or set KOMODO_PROFILE=1 to profile the next
+# PROFILE_FRAMES frames into PROFILE_DIR, keeping the newest PROFILE_KEEP runs
+PROFILE_ON_START = os.environ.get('KOMODO_PROFILE') == '1'
+PROFILE_HOTKEY = pygame.K_F9
+PROFILE_FRAMES = int(os.environ.get('KOMODO_PROFILE_FRAMES', '300'))
+PROFILE_DIR = os.environ.get('KOMODO_PROFILE_DIR', 'profiles')
+PROFILE_KEEP = 10
+PROFILE_SAMPLE_INTERVAL = 0.001  # Seconds between stack samples for the collapsed stacks
+
+# Allocation profiler: per-frame allocations by call site and GC pauses (KOMODO_ALLOC_PROFILE=1)
+ALLOC_PROFILE = os.environ.get('KOMODO_ALLOC_PROFILE') == '1'
+ALLOC_REPORT = os.environ.get('KOMODO_ALLOC_REPORT', 'alloc_profile.json')
+ALLOC_SNAPSHOT_INTERVAL = 30  # Frames between call-site snapshots (snapshots are slow)
+ALLOC_TOP_SITES = 15
+
+# GC controls: freeze everything loaded before play, and/or set "gen0,gen1,gen2" thresholds
+GC_FREEZE_AFTER_LOAD = os.environ.get('KOMODO_GC_FREEZE') == '1'
+GC_THRESHOLD = os.environ.get('KOMODO_GC_THRESHOLD')
+
+# Vitals recorder settings: record per-frame samples under KOMODO_VITALS_DIR (requires NumPy)
+VITALS_DIR = os.environ.get('KOMODO_VITALS_DIR')
+VITALS_CHUNK_SIZE = 4096  # Samples per spilled chunk file (~68 s at 60 FPS)
+VITALS_CHUNKS = 3  # Chunks in the ring: one recording, up to two waiting to be written
+VITALS_COLUMNS = [
+    ('timestamp', 'f8'),  # Unix time in seconds
+    ('age', 'i4'),
+    ('hunger', 'i2'),
+    ('state', 'i1'),  # MENU, PLAYING or GAME_OVER
+    ('stage', 'i1'),  # Index into LIFE_STAGES
+    ('flies', 'i2'),  # Flies alive
+    ('feeds', 'i4'),  # Feeds so far this life, a step marks a feed
+    ('frame_time', 'f4'),  # Seconds
+]
+
+# Capture settings: record the window under KOMODO_CAPTURE_DIR as PNG frames or one raw RGB file
+CAPTURE_DIR = os.environ.get('KOMODO_CAPTURE_DIR')
+CAPTURE_FORMAT = os.environ.get('KOMODO_CAPTURE_FORMAT', 'png')  # 'png' or 'raw'
+CAPTURE_WORKERS = int(os.environ.get('KOMODO_CAPTURE_WORKERS', 2))
+CAPTURE_BUFFERS = 4  # Frames in flight; a frame is dropped when all buffers are busy
+CAPTURE_PNG_LEVEL = 1  # zlib level; higher is smaller but slower to encode
+
+# Startup settings
+FAST_STARTUP = os.environ.get('KOMODO_FAST_STARTUP', '1') == '1'  # Selective init and early first frame
+STARTUP_LOG = os.environ.get('KOMODO_STARTUP_LOG')  # Append each startup timeline here as a JSON line
+SOUND_DIR = 'sounds'
+SOUND_EXTENSIONS = ('.wav', '.ogg', '.mp3')
+
+# Sound settings: effects are sounds/<name>.wav|ogg|mp3, music is sounds/music.*
+SOUND_FREQUENCY = 44100
+SOUND_BUFFER = 512  # Mixer buffer in samples (~12 ms), small for low latency
+SOUND_CHANNELS = 8  # Channels reserved for the effect pool
+SOUND_FREE_CHANNELS = 1  # Channels left unreserved for Sound.play() elsewhere
+SOUND_EFFECTS = {'eat': 1, 'hatch': 2, 'stage_change': 2, 'death': 3}  # Effect name -> priority
+MUSIC_NAME = 'music'
+MUSIC_VOLUME = 0.5
+
 # Animation timing settings
 ANIMATION_SPEED = 0.1
 EATING_DURATION = 500
@@ -59,19 +298,29 @@ AGE_INCREMENT_INTERVAL = 3000  # Time between age increments in ms
 TOMBSTONE_SIZE = (260, 360)  # Size for the tombstone image (2x bigger)
 TOMBSTONE_FLY_RADIUS = 140  # Increased radius for flies to swarm around the larger tombstone
 TOMBSTONE_FLY_COUNT = 8  # Number of flies in game over state
+MENU_OVERLAY_ALPHA = 100  # Darkening of the background behind the menu
+
+# Adaptive quality: levels the frame-budget watchdog steps through, best first.
+# animation_frame_time is ms per sprite frame; scroll_speed is pixels per frame.
+QualityLevel = namedtuple('QualityLevel', 'name explosion_scale tombstone_flies animation_frame_time translucent_overlay scroll_speed')
+QUALITY_LEVELS = [
+    QualityLevel('high', 1.0, TOMBSTONE_FLY_COUNT, 100, True, BACKGROUND_SCROLL_SPEED),
+    QualityLevel('medium', 0.5, 6, 150, True, BACKGROUND_SCROLL_SPEED),
+    QualityLevel('low', 0.25, 4, 200, False, BACKGROUND_SCROLL_SPEED * 0.5),
+]
+ADAPTIVE_QUALITY = os.environ.get('KOMODO_ADAPTIVE_QUALITY', '1') == '1'
+WATCHDOG_WINDOW = 60  # Frames in the rolling average
+WATCHDOG_STEP_DOWN = 1.0  # Step down when the average exceeds this fraction of the frame budget
+WATCHDOG_STEP_UP = 0.5  # Step up when the average stays below this fraction...
+WATCHDOG_UP_HOLD = 4  # ...for this many windows
 
 #----------------------------------------------------------------------
 # UTILITY FUNCTIONS
 #----------------------------------------------------------------------
 
-# Function to calculate hunger interval based on age
-def get_hunger_interval(age):
-    if age < 10:
-        return 1000  # 1 second for baby
-    elif age < 20:
-        return 1000  # 1 second for teenager
-    else:
-        return 1000  # 1 second for adult
+# Function to look up the life stage for an age
+def get_life_stage(age):
+    return LIFE_STAGES[LIFE_STAGE_BY_AGE[min(age, len(LIFE_STAGE_BY_AGE) - 1)]]
 
 # Function to load and scale an image
 def load_image(path, scale_to=None, convert_alpha=True):
@@ -97,6 +346,22 @@ def load_image(path, scale_to=None, convert_alpha=True):
         pygame.draw.line(fallback, (255, 0, 255), (0, fallback.get_rect().bottom), (fallback.get_rect().right, 0), 2)
         return fallback
 
+# Function to list the sound files shipped with the game
+def find_sound_files():
+    if not os.path.isdir(SOUND_DIR):
+        return []
+    return sorted(os.path.join(SOUND_DIR, name) for name in os.listdir(SOUND_DIR)
+                  if name.lower().endswith(SOUND_EXTENSIONS))
+
+# Function to calculate the pixel memory held by a surface
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+# Function to estimate the memory of a collision mask (one bit per pixel)
+def mask_bytes(mask):
+    width, height = mask.get_size()
+    return (width * height + 7) // 8
+
 # Function to load logo with proper aspect ratio
 def load_and_scale_logo(path):
     try:
@@ -146,8 +411,8 @@ class AssetLoader:
         self.animations = {}
         self.sounds = {}
         
-    def load_image(self, name, path, scale=None, convert_alpha=True):
-        """Load a single image and store it under the given name."""
+    def load_image(self, name, path, scale=None, convert_alpha=True, store=True):
+        """Load a single image and store it under the given name (unless store is False)."""
         try:
             if convert_alpha:
                 image = pygame.image.load(path).convert_alpha()
@@ -157,7 +422,8 @@ class AssetLoader:
             if scale:
                 image = pygame.transform.scale(image, scale)
                 
-            self.images[name] = image
+            if store:
+                self.images[name] = image
             logger.info(f"Loaded image: {name} from {path}")
             return image
         except Exception as e:
@@ -172,7 +438,8 @@ class AssetLoader:
             pygame.draw.line(fallback, (255, 0, 255), (0, 0), fallback.get_rect().bottomright, 2)
             pygame.draw.line(fallback, (255, 0, 255), (0, fallback.get_rect().bottom), (fallback.get_rect().right, 0), 2)
             
-            self.images[name] = fallback
+            if store:
+                self.images[name] = fallback
             return fallback
             
     def load_animation_frames(self, name, folder_path, filename_pattern, frame_count, scale=None):
@@ -183,7 +450,8 @@ class AssetLoader:
             frame_path = os.path.join(folder_path, f"{filename_pattern}{i}.png")
             frame_name = f"{name}_{i}"
             
-            frame = self.load_image(frame_name, frame_path, scale)
+            # Frames live only in self.animations so each one is held once
+            frame = self.load_image(frame_name, frame_path, scale, store=False)
             frames.append(frame)
             
         self.animations[name] = frames
@@ -222,6 +490,16 @@ class AssetLoader:
         logger.warning(f"Sound '{name}' not found in loader")
         return None
         
+    def memory_usage(self):
+        """Return bytes held per image and animation name, plus the total."""
+        usage = {}
+        for name, image in self.images.items():
+            usage[name] = surface_bytes(image)
+        for name, frames in self.animations.items():
+            usage[name] = sum(surface_bytes(frame) for frame in frames)
+        usage['total'] = sum(usage.values())
+        return usage
+        
     def extract_frames_from_spritesheet(self, name, sheet_path, frame_width, frame_height, frame_count, scale=None):
         """Extract frames from a spritesheet and store them as an animation."""
         try:
@@ -256,6 +534,323 @@ class AssetLoader:
             self.animations[name] = frames
             return frames
 
+#----------------------------------------------------------------------
+# SOUND MANAGER
+#----------------------------------------------------------------------
+
+class SoundManager:
+    """
+    Plays sound effects from a pool of reserved mixer channels.
+    Effects are decoded into Sound buffers (already in the mixer's format)
+    at load time. When every channel is busy, a new effect steals the
+    channel playing the lowest priority effect, oldest first, as long as that
+    priority is not higher than its own. Music is streamed with
+    pygame.mixer.music. Does nothing when the mixer is not initialized.
+    """
+    def __init__(self, channel_count=SOUND_CHANNELS):
+        self.enabled = pygame.mixer.get_init() is not None
+        self.loader = AssetLoader()
+        self.channels = []
+        self.channel_priorities = []
+        self.channel_start_times = []
+        if self.enabled:
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), channel_count + SOUND_FREE_CHANNELS))
+            # Reserved channels are never picked by Sound.play() elsewhere; the rest stay free for it
+            pygame.mixer.set_reserved(channel_count)
+            self.channels = [pygame.mixer.Channel(i) for i in range(channel_count)]
+            self.channel_priorities = [0] * channel_count
+            self.channel_start_times = [0] * channel_count
+        self.music_path = None
+        
+    def load(self):
+        if not self.enabled:
+            return
+        for path in find_sound_files():
+            name = os.path.splitext(os.path.basename(path))[0]
+            if name in SOUND_EFFECTS:
+                self.loader.load_sound(name, path)
+            elif name == MUSIC_NAME:
+                self.music_path = path
+                
+    def play(self, name):
+        sound = self.loader.sounds.get(name)
+        if sound is None:
+            return
+        priority = SOUND_EFFECTS[name]
+        
+        index = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                index = i
+                break
+        if index is None:
+            # Voice stealing: lowest priority first, then the oldest sound
+            index = min(range(len(self.channels)), key=lambda i: (self.channel_priorities[i], self.channel_start_times[i]))
+            if self.channel_priorities[index] > priority:
+                return
+        
+        self.channels[index].play(sound)
+        self.channel_priorities[index] = priority
+        self.channel_start_times[index] = pygame.time.get_ticks()
+        
+    def play_music(self, loops=-1):
+        if not self.enabled or not self.music_path:
+            return
+        try:
+            pygame.mixer.music.load(self.music_path)
+            pygame.mixer.music.set_volume(MUSIC_VOLUME)
+            pygame.mixer.music.play(loops)
+        except pygame.error as e:
+            logger.error(f"Failed to play music {self.music_path}: {e}")
+
+#----------------------------------------------------------------------
+# FRAME STORE
+#----------------------------------------------------------------------
+
+class FrameSet(list):
+    """
+    A list of animation frames that may have been cropped as a group.
+    offset is the distance from the untrimmed frame center to the center
+    of the cropped frames, used to keep sprites at their visual position.
+    """
+    def __init__(self, frames=()):
+        super().__init__(frames)
+        self.offset = (0, 0)
+        self.trim_rect = None
+        self.masks = None  # Per-frame collision masks, built once at load time
+        self.rotations = None  # rotations[frame][heading bucket], see build_rotations
+        self.rotation_offsets = None
+
+# Function to look up the anchor offset of a frame list (plain lists have none)
+def frame_offset(frames):
+    return getattr(frames, 'offset', (0, 0))
+
+# Function to pre-rotate frames to count headings spread over a full turn.
+# Frames face right (heading 0); left-facing headings use the mirrored frame so the
+# sprite never turns upside down. Each rotation is cropped to its opaque area, and
+# offsets[frame][bucket] is the distance from the frame center to the crop's center.
+def build_rotations(frames, count):
+    rotations = []
+    offsets = []
+    for frame in frames:
+        mirrored = pygame.transform.flip(frame, True, False)
+        row = []
+        offset_row = []
+        for bucket in range(count):
+            heading = 360 * bucket / count
+            if 90 < heading < 270:
+                rotated = pygame.transform.rotate(mirrored, 180 - heading)
+            else:
+                rotated = pygame.transform.rotate(frame, -heading)
+            # rotate() keeps the frame center at the center of its bounding box
+            full_rect = rotated.get_rect()
+            bounds = rotated.get_bounding_rect()
+            if not (bounds.width and bounds.height):
+                bounds = full_rect
+            row.append(rotated.subsurface(bounds).copy())
+            offset_row.append((bounds.centerx - full_rect.centerx, bounds.centery - full_rect.centery))
+        rotations.append(row)
+        offsets.append(offset_row)
+    return rotations, offsets
+
+# Function to look up the cached collision mask of a frame (None if not built)
+def frame_mask(frames, index):
+    masks = getattr(frames, 'masks', None)
+    return masks[index] if masks else None
+
+# Function to test a point against a sprite's opaque pixels using its cached mask
+def collide_sprite_point(sprite, pos):
+    if not sprite.rect.collidepoint(pos):
+        return False
+    mask = getattr(sprite, 'mask', None)
+    if mask is None:
+        return True
+    return bool(mask.get_at((pos[0] - sprite.rect.x, pos[1] - sprite.rect.y)))
+
+# Function to crop a set of equally sized frames to their shared opaque bounding box
+def trim_frame_set(frames):
+    opaque_rects = [frame.get_bounding_rect() for frame in frames]
+    opaque_rects = [rect for rect in opaque_rects if rect.width and rect.height]
+    if not opaque_rects:
+        return FrameSet(frames)
+    
+    # One crop rect for the whole set keeps every frame of the animation aligned
+    trim_rect = opaque_rects[0].unionall(opaque_rects[1:])
+    full_rect = frames[0].get_rect()
+    if trim_rect == full_rect:
+        return FrameSet(frames)
+    
+    trimmed = FrameSet(frame.subsurface(trim_rect).copy() for frame in frames)
+    trimmed.trim_rect = trim_rect
+    trimmed.offset = (trim_rect.centerx - full_rect.centerx, trim_rect.centery - full_rect.centery)
+    return trimmed
+
+class FrameStore:
+    """
+    Shared store holding one copy of every loaded frame.
+    Derived variants (flips, tints, alternate scales) are generated on first
+    use and kept in an LRU cache bounded by a byte budget.
+    """
+    def __init__(self, variant_budget=FRAME_VARIANT_BUDGET):
+        self.frames = {}  # (path, size) -> Surface
+        self.variants = OrderedDict()  # (id(frame), kind, arg) -> (frame, variant Surface)
+        self.variant_budget = variant_budget
+        self.variant_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        
+    def load(self, path, size=None):
+        """Return the frame for path scaled to size, loading it only once."""
+        key = (path, size)
+        frame = self.frames.get(key)
+        if frame is None:
+            frame = load_image(path, size)
+            self.frames[key] = frame
+        return frame
+    
+    def replace(self, path, size, frame):
+        """Swap in a new surface for path (used by hot reload) and drop its variants."""
+        old_frame = self.frames.get((path, size))
+        self.frames[(path, size)] = frame
+        if old_frame is not None:
+            self.invalidate(old_frame)
+        
+    def get_variant(self, frame, kind, arg):
+        """
+        Return a derived version of frame, building it on a cache miss.
+        kind is 'flip' (arg = (flip_x, flip_y)), 'tint' (arg = RGB multiplier),
+        'scale' (arg = (width, height)), 'mip' (arg = level >= 1, half the
+        size of the level above) or 'light' (arg = (RGB multiply, RGB add)).
+        """
+        key = (id(frame), kind, arg)
+        entry = self.variants.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.variants.move_to_end(key)
+            return entry[1]
+        
+        self.misses += 1
+        variant = self.build_variant(frame, kind, arg)
+        # Keep a reference to the source frame so its id cannot be reused while cached
+        self.variants[key] = (frame, variant)
+        self.variant_bytes += surface_bytes(variant)
+        self.evict()
+        return variant
+    
+    def build_variant(self, frame, kind, arg):
+        if kind == 'flip':
+            return pygame.transform.flip(frame, arg[0], arg[1])
+        if kind == 'tint':
+            variant = frame.copy()
+            variant.fill(arg, special_flags=pygame.BLEND_RGB_MULT)
+            return variant
+        if kind == 'scale':
+            try:
+                return pygame.transform.smoothscale(frame, arg)
+            except ValueError:
+                # smoothscale only handles 24/32-bit surfaces
+                return pygame.transform.scale(frame, arg)
+        if kind == 'light':
+            variant = frame.copy()
+            variant.fill(arg[0], special_flags=pygame.BLEND_RGB_MULT)
+            if any(arg[1]):
+                variant.fill(arg[1], special_flags=pygame.BLEND_RGB_ADD)
+            return variant
+        if kind == 'mip':
+            source = frame if arg == 1 else self.get_variant(frame, 'mip', arg - 1)
+            size = (max(1, source.get_width() // 2), max(1, source.get_height() // 2))
+            try:
+                return pygame.transform.smoothscale(source, size)
+            except ValueError:
+                return pygame.transform.scale(source, size)
+        raise ValueError(f"Unknown frame variant: {kind}")
+    
+    def evict(self):
+        """Drop least recently used variants until the cache fits the budget."""
+        while self.variant_bytes > self.variant_budget and len(self.variants) > 1:
+            _, (_, variant) = self.variants.popitem(last=False)
+            self.variant_bytes -= surface_bytes(variant)
+            
+    def invalidate(self, frame):
+        """Drop every cached variant derived from frame."""
+        for key in [key for key, entry in self.variants.items() if entry[0] is frame]:
+            _, variant = self.variants.pop(key)
+            self.variant_bytes -= surface_bytes(variant)
+            
+    def memory_usage(self):
+        """Return bytes held by base frames, cached variants and both combined."""
+        base_bytes = sum(surface_bytes(frame) for frame in self.frames.values())
+        return {'frames': base_bytes, 'variants': self.variant_bytes, 'total': base_bytes + self.variant_bytes}
+
+#----------------------------------------------------------------------
+# ASSET HOT RELOAD
+#----------------------------------------------------------------------
+
+class AssetWatcher:
+    """
+    Development-mode watcher that reloads asset files when they change on disk.
+    Files are stat'ed round-robin a few per frame and changed files are
+    reloaded one per frame, so a large edit never stalls the game loop.
+    Reloads spanning several files (a whole frame set) are scheduled as
+    generator jobs that load one file per step and run one step per frame.
+    """
+    def __init__(self, stats_per_frame=HOT_RELOAD_STATS_PER_FRAME, loads_per_frame=HOT_RELOAD_LOADS_PER_FRAME):
+        self.stats_per_frame = stats_per_frame
+        self.loads_per_frame = loads_per_frame
+        self.callbacks = {}  # path -> list of reload callbacks
+        self.mtimes = {}  # path -> last seen modification time
+        self.paths = []
+        self.next_index = 0
+        self.pending = []  # Changed paths waiting to be reloaded
+        self.jobs = OrderedDict()  # key -> multi-file reload generator, one step per frame
+        
+    def watch(self, path, callback):
+        """Call callback(path) whenever the file at path changes."""
+        if path not in self.callbacks:
+            self.callbacks[path] = []
+            self.mtimes[path] = self.get_mtime(path)
+            self.paths.append(path)
+        self.callbacks[path].append(callback)
+        
+    def schedule(self, key, job):
+        """Run generator job one step per frame; scheduling the same key again restarts it."""
+        self.jobs[key] = job
+        
+    def get_mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        
+    def poll(self):
+        """Check a slice of the watched files and reload pending changes."""
+        for _ in range(min(self.stats_per_frame, len(self.paths))):
+            path = self.paths[self.next_index]
+            self.next_index = (self.next_index + 1) % len(self.paths)
+            mtime = self.get_mtime(path)
+            if mtime != self.mtimes[path]:
+                self.mtimes[path] = mtime
+                if mtime is not None and path not in self.pending:
+                    self.pending.append(path)
+        
+        for _ in range(min(self.loads_per_frame, len(self.pending))):
+            path = self.pending.pop(0)
+            for callback in self.callbacks[path]:
+                try:
+                    callback(path)
+                except Exception as e:
+                    logger.error(f"Failed to hot reload {path}: {e}")
+            logger.info(f"Hot reloaded asset: {path}")
+        
+        for _ in range(min(self.loads_per_frame, len(self.jobs))):
+            key, job = next(iter(self.jobs.items()))
+            try:
+                if next(job, StopIteration) is StopIteration:
+                    del self.jobs[key]
+            except Exception as e:
+                logger.error(f"Failed to hot reload {key}: {e}")
+                del self.jobs[key]
+
 #----------------------------------------------------------------------
 # SPRITE CLASSES
 #----------------------------------------------------------------------
@@ -276,65 +871,54 @@ def extract_frames(sheet, frame_width, frame_height, num_frames):
 
 # Function to calculate fly speed based on pet's age
 def get_fly_speed(age):
-    if age < 10:
-        return 3  # Reduced speed for baby
-    elif age < 20:
-        return 4.5  # Reduced speed for teenager
-    else:
-        return 6  # Reduced speed for adult
-
-# Function to calculate the maximum number of flies based on pet's age
-def get_max_flies(age):
-    if age < 10:
-        return 3  # Maximum 3 flies for baby
-    elif age < 20:
-        return 2  # Maximum 2 flies for teenager
-    else:
-        return 1  # Maximum 1 fly for adult
+    return get_life_stage(age).fly_speed
+
+# Function to load the tombstone image scaled to size, keeping its aspect ratio
+def load_tombstone_image(size=TOMBSTONE_SIZE):
+    try:
+        image = pygame.image.load('graphics/tombstone.png').convert_alpha()
+        
+        # Get original dimensions for proper aspect ratio scaling
+        orig_width, orig_height = image.get_size()
+        aspect_ratio = orig_width / orig_height
+        
+        # Determine new dimensions while preserving aspect ratio
+        # If the original image is already stretched, we'll correct it
+        new_width = size[0]
+        new_height = size[1]
+        
+        # If needed, adjust based on aspect ratio to prevent distortion
+        if new_width / new_height != aspect_ratio:
+            # We'll prioritize the height and adjust width accordingly
+            new_width = int(new_height * aspect_ratio)
+            if new_width > size[0] * 1.2:  # Limit maximum width
+                new_width = size[0]
+                new_height = int(new_width / aspect_ratio)
+        
+        image = pygame.transform.scale(image, (new_width, new_height))
+        print(f"Tombstone scaled to {new_width}x{new_height}")
+        
+    except Exception as e:
+        print(f"Error loading tombstone image: {e}")
+        # Create a placeholder tombstone
+        image = pygame.Surface(size, pygame.SRCALPHA)
+        # Draw a more tombstone-like shape
+        tombstone_color = (120, 120, 120)
+        # Base
+        pygame.draw.rect(image, tombstone_color, (size[0]//4, size[1]//2, size[0]//2, size[1]//2))
+        # Top rounded part
+        pygame.draw.rect(image, tombstone_color, (size[0]//4, 0, size[0]//2, size[1]//2), border_radius=15)
+        # Add some texture/details
+        darker_color = (80, 80, 80)
+        pygame.draw.rect(image, darker_color, (size[0]//4, 0, size[0]//2, size[1]//2), 3, border_radius=15)
+        pygame.draw.line(image, darker_color, (size[0]//2, size[1]//4), (size[0]//2, size[1]//2 + size[1]//4), 2)
+    return image
 
 # Tombstone sprite class
 class TombstoneSprite(pygame.sprite.Sprite):
-    def __init__(self, x, y, size=TOMBSTONE_SIZE):
+    def __init__(self, x, y, image):
         super().__init__()
-        # Try to load the tombstone image
-        try:
-            self.image = pygame.image.load('graphics/tombstone.png').convert_alpha()
-            
-            # Get original dimensions for proper aspect ratio scaling
-            orig_width, orig_height = self.image.get_size()
-            aspect_ratio = orig_width / orig_height
-            
-            # Determine new dimensions while preserving aspect ratio
-            # If the original image is already stretched, we'll correct it
-            new_width = size[0]
-            new_height = size[1]
-            
-            # If needed, adjust based on aspect ratio to prevent distortion
-            if new_width / new_height != aspect_ratio:
-                # We'll prioritize the height and adjust width accordingly
-                new_width = int(new_height * aspect_ratio)
-                if new_width > size[0] * 1.2:  # Limit maximum width
-                    new_width = size[0]
-                    new_height = int(new_width / aspect_ratio)
-            
-            self.image = pygame.transform.scale(self.image, (new_width, new_height))
-            print(f"Tombstone scaled to {new_width}x{new_height}")
-            
-        except Exception as e:
-            print(f"Error loading tombstone image: {e}")
-            # Create a placeholder tombstone
-            self.image = pygame.Surface(size, pygame.SRCALPHA)
-            # Draw a more tombstone-like shape
-            tombstone_color = (120, 120, 120)
-            # Base
-            pygame.draw.rect(self.image, tombstone_color, (size[0]//4, size[1]//2, size[0]//2, size[1]//2))
-            # Top rounded part
-            pygame.draw.rect(self.image, tombstone_color, (size[0]//4, 0, size[0]//2, size[1]//2), border_radius=15)
-            # Add some texture/details
-            darker_color = (80, 80, 80)
-            pygame.draw.rect(self.image, darker_color, (size[0]//4, 0, size[0]//2, size[1]//2), 3, border_radius=15)
-            pygame.draw.line(self.image, darker_color, (size[0]//2, size[1]//4), (size[0]//2, size[1]//2 + size[1]//4), 2)
-        
+        self.image = image  # Loaded once with the other assets (see load_tombstone_image)
         self.rect = self.image.get_rect(center=(x, y))
         self.death_time = pygame.time.get_ticks()
         
@@ -345,13 +929,18 @@ class TombstoneSprite(pygame.sprite.Sprite):
 
 # Base animated sprite class
 class AnimatedSprite(pygame.sprite.Sprite):
+    frame_time = QUALITY_LEVELS[0].animation_frame_time  # ms per frame, set by Game.apply_quality
+    
     def __init__(self, frames, x, y):
         super().__init__()
         self.frames = frames
         self.eating_frames = []  # Will be set separately for each age group
         self.current_frame = 0
         self.image = self.frames[self.current_frame]
-        self.rect = self.image.get_rect(center=(x, y))
+        # Trimmed frames are shifted so the sprite keeps its untrimmed visual center
+        self.mask = frame_mask(frames, self.current_frame)
+        self.image_offset = frame_offset(frames)
+        self.rect = self.image.get_rect(center=(x + self.image_offset[0], y + self.image_offset[1]))
         self.animation_speed = 0.1  # Adjust the speed of the animation
         self.last_update = pygame.time.get_ticks()
         self.is_eating = False
@@ -365,7 +954,7 @@ class AnimatedSprite(pygame.sprite.Sprite):
             if now - self.last_update > 100:  # Faster animation for eating
                 self.last_update = now
                 self.current_frame = (self.current_frame + 1) % len(self.eating_frames)
-                self.image = self.eating_frames[self.current_frame]
+                self.show_frame(self.eating_frames, self.current_frame)
                 # Debug: Print current eating frame
                 print(f"Eating frame: {self.current_frame}")
             
@@ -376,10 +965,21 @@ class AnimatedSprite(pygame.sprite.Sprite):
                 self.current_frame = 0
         else:
             # Regular animation
-            if now - self.last_update > 100:
+            if now - self.last_update > self.frame_time:
                 self.last_update = now
                 self.current_frame = (self.current_frame + 1) % len(self.frames)
-                self.image = self.frames[self.current_frame]
+                self.show_frame(self.frames, self.current_frame)
+
+    def show_frame(self, frames, index):
+        """Display frames[index], re-anchoring the rect if the frame set changed."""
+        self.image = frames[index]
+        self.mask = frame_mask(frames, index)
+        offset = frame_offset(frames)
+        if offset != self.image_offset or self.image.get_size() != self.rect.size:
+            center_x = self.rect.centerx - self.image_offset[0] + offset[0]
+            center_y = self.rect.centery - self.image_offset[1] + offset[1]
+            self.image_offset = offset
+            self.rect = self.image.get_rect(center=(center_x, center_y))
 
     def start_eating(self):
         print("Starting eating animation")  # Debug print
@@ -387,7 +987,7 @@ class AnimatedSprite(pygame.sprite.Sprite):
         self.eating_timer = pygame.time.get_ticks()
         self.current_frame = 0
         # Ensure we immediately show the first eating frame
-        self.image = self.eating_frames[0]
+        self.show_frame(self.eating_frames, 0)
 
 # Specialized egg sprite class
 class EggSprite(pygame.sprite.Sprite):
@@ -403,7 +1003,9 @@ class EggSprite(pygame.sprite.Sprite):
         # Set initial state
         self.current_frame = 0
         self.image = self.frames[self.current_frame]
-        self.rect = self.image.get_rect(center=(x, y))
+        self.mask = frame_mask(frames, self.current_frame)
+        self.image_offset = frame_offset(frames)
+        self.rect = self.image.get_rect(center=(x + self.image_offset[0], y + self.image_offset[1]))
         self.animation_completed = False
         self.animation_started = False
         self.frame_delay = 1000  # Reduced from 2000 to 1000 ms - faster frame rate
@@ -454,13 +1056,15 @@ class EggSprite(pygame.sprite.Sprite):
             
             # Update the image and timestamp
             self.image = self.frames[self.current_frame]
+            self.mask = frame_mask(self.frames, self.current_frame)
             self.last_update = now
         
         # Apply shake effect
         if self.shake_amount > 0:
             shake_x = random.randint(-self.shake_amount, self.shake_amount)
             shake_y = random.randint(-self.shake_amount, self.shake_amount)
-            self.rect.center = (self.original_pos[0] + shake_x, self.original_pos[1] + shake_y)
+            self.rect.center = (self.original_pos[0] + self.image_offset[0] + shake_x,
+                                self.original_pos[1] + self.image_offset[1] + shake_y)
             
             # Gradually reduce shake
             if random.random() > 0.8:  # 20% chance each frame to reduce shake
@@ -482,18 +1086,19 @@ class FlySprite(AnimatedSprite):
         self.orbit_distance = random.uniform(TOMBSTONE_FLY_RADIUS - 20, TOMBSTONE_FLY_RADIUS + 20)  # Random orbit distance
         self.orbit_center = None  # Will be set when game over occurs
         self.orbit_height_offset = random.uniform(-30, 30)  # Vertical variation
-
-    def update(self):
-        super().update()
+        self.rotations = getattr(frames, 'rotations', None)
+        self.rotation_offsets = getattr(frames, 'rotation_offsets', None)
+        self.heading_scale = len(self.rotations[0]) / (2 * math.pi) if self.rotations else 0
         
-        # Update speed based on pet's age
-        self.speed = get_fly_speed(self.pet_age)
+    def update(self, frame_scale=1.0):
+        super().update()
+        heading = self.direction
         
         # Only move if not being dragged
         if not self.being_dragged:
             if self.game_over_mode and self.orbit_center:
                 # Orbit around tombstone behavior
-                self.orbit_angle += self.orbit_speed
+                self.orbit_angle += self.orbit_speed * frame_scale
                 
                 # Calculate position on elliptical orbit
                 orbit_x = self.orbit_center[0] + math.cos(self.orbit_angle) * self.orbit_distance
@@ -503,7 +1108,8 @@ class FlySprite(AnimatedSprite):
                 orbit_x += random.uniform(-1, 1)
                 orbit_y += random.uniform(-1, 1)
                 
-                self.rect.center = (orbit_x, orbit_y)
+                self.rect.center = (orbit_x + self.image_offset[0], orbit_y + self.image_offset[1])
+                heading = self.orbit_angle + math.pi / 2  # Tangent to the orbit
             else:
                 # Normal movement behavior
                 # Change direction randomly
@@ -513,8 +1119,8 @@ class FlySprite(AnimatedSprite):
                     self.direction_change_time = now
 
                 # Move in current direction
-                dx = self.speed * math.cos(self.direction)
-                dy = self.speed * math.sin(self.direction)
+                dx = self.speed * math.cos(self.direction) * frame_scale
+                dy = self.speed * math.sin(self.direction) * frame_scale
                 self.rect.x += dx
                 self.rect.y += dy
 
@@ -531,6 +1137,22 @@ class FlySprite(AnimatedSprite):
                 if self.rect.bottom > FLY_BOUNDARY_BOTTOM:
                     self.rect.bottom = FLY_BOUNDARY_BOTTOM
                     self.direction = random.uniform(math.pi, 2*math.pi)  # Force direction upward
+                heading = self.direction
+        
+        # Face the heading with the nearest pre-rotated frame
+        if self.rotations:
+            row = self.rotations[self.current_frame]
+            index = round(heading * self.heading_scale) % len(row)
+            if row[index] is not self.image:
+                self.show_rotation(row[index], self.rotation_offsets[self.current_frame][index])
+    
+    def show_rotation(self, image, offset):
+        """Display a pre-rotated frame, keeping the fly's center where it is."""
+        center_x = self.rect.centerx - self.image_offset[0] + offset[0]
+        center_y = self.rect.centery - self.image_offset[1] + offset[1]
+        self.image = image
+        self.image_offset = offset
+        self.rect = image.get_rect(center=(center_x, center_y))
 
     def start_drag(self):
         self.being_dragged = True
@@ -538,13 +1160,14 @@ class FlySprite(AnimatedSprite):
     
     def update_drag_position(self, pos):
         if self.being_dragged:
-            self.rect.center = pos
+            self.rect.center = (pos[0] + self.image_offset[0], pos[1] + self.image_offset[1])
     
     def stop_drag(self):
         self.being_dragged = False
         
     def update_pet_age(self, pet_age):
         self.pet_age = pet_age
+        self.speed = get_fly_speed(pet_age)
         
     def set_game_over_mode(self, enabled, center=None):
         """Set the fly to game over mode orbiting the tombstone"""
@@ -557,38 +1180,41 @@ class FlySprite(AnimatedSprite):
             self.orbit_speed = random.uniform(0.01, 0.03)
             self.orbit_distance = random.uniform(TOMBSTONE_FLY_RADIUS - 10, TOMBSTONE_FLY_RADIUS + 10)
 
+# Function to draw the frames of an explosion burst with num_particles particles
+def build_explosion_frames(num_particles=16):
+    frames = []
+    
+    # Create 8 frames of explosion
+    colors = [(255, 255, 0), (255, 165, 0), (255, 69, 0), (255, 0, 0)]  # Yellow, orange, dark orange, red
+    for i in range(8):
+        # Size increases then decreases
+        size = 100 if i < 4 else 100 - (i - 3) * 20
+        
+        frame = pygame.Surface((size, size), pygame.SRCALPHA)
+        
+        # Draw explosion parts (particles)
+        color = colors[min(i // 2, len(colors) - 1)]
+        
+        for p in range(num_particles):
+            angle = p * (2 * math.pi / num_particles)
+            dist = size // 2 - 5 - random.randint(0, 10)
+            pos_x = size // 2 + int(dist * math.cos(angle))
+            pos_y = size // 2 + int(dist * math.sin(angle))
+            radius = max(2, (8 - i) * 2) + random.randint(-2, 2)
+            pygame.draw.circle(frame, color, (pos_x, pos_y), radius)
+        
+        # Add white center
+        center_size = max(5, 25 - i * 3)
+        pygame.draw.circle(frame, (255, 255, 255), (size // 2, size // 2), center_size)
+        
+        frames.append(frame)
+    return frames
+
 # Explosion animation sprite
 class ExplosionSprite(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    def __init__(self, x, y, frames):
         super().__init__()
-        # Generate explosion animation frames programmatically
-        self.frames = []
-        
-        # Create 8 frames of explosion
-        colors = [(255, 255, 0), (255, 165, 0), (255, 69, 0), (255, 0, 0)]  # Yellow, orange, dark orange, red
-        for i in range(8):
-            # Size increases then decreases
-            size = 100 if i < 4 else 100 - (i - 3) * 20
-            
-            frame = pygame.Surface((size, size), pygame.SRCALPHA)
-            
-            # Draw explosion parts (particles)
-            num_particles = 16
-            color = colors[min(i // 2, len(colors) - 1)]
-            
-            for p in range(num_particles):
-                angle = p * (2 * math.pi / num_particles)
-                dist = size // 2 - 5 - random.randint(0, 10)
-                pos_x = size // 2 + int(dist * math.cos(angle))
-                pos_y = size // 2 + int(dist * math.sin(angle))
-                radius = max(2, (8 - i) * 2) + random.randint(-2, 2)
-                pygame.draw.circle(frame, color, (pos_x, pos_y), radius)
-            
-            # Add white center
-            center_size = max(5, 25 - i * 3)
-            pygame.draw.circle(frame, (255, 255, 255), (size // 2, size // 2), center_size)
-            
-            self.frames.append(frame)
+        self.frames = frames  # Drawn once at load time (see build_explosion_frames)
         
         self.current_frame = 0
         self.image = self.frames[self.current_frame]
@@ -635,6 +1261,469 @@ def create_tombstone_flies(fly_frames, fly_sprites, tombstone_center, count=TOMB
         fly.set_game_over_mode(True, tombstone_center)
         fly_sprites.add(fly)
 
+#----------------------------------------------------------------------
+# PARTICLE SYSTEM
+#----------------------------------------------------------------------
+
+class ParticleSystem:
+    """
+    Particles kept in NumPy arrays (position, velocity, age, lifetime) and
+    updated in bulk. Each particle is a small square whose color steps
+    through the palette over its lifetime. On 32-bit surfaces particles are
+    written into the pixel array with vectorized stores; other surfaces get
+    one batched blits/fblits call of pre-rendered squares.
+    """
+    def __init__(self, budget, palette, size=(3, 3), gravity=0.0):
+        self.budget = budget
+        self.palette = palette
+        self.size = size
+        self.gravity = gravity
+        self.positions = np.zeros((budget, 2), np.float32)
+        self.velocities = np.zeros((budget, 2), np.float32)
+        self.ages = np.zeros(budget, np.float32)
+        self.lifetimes = np.ones(budget, np.float32)
+        self.count = 0
+        self.sprites = {}  # scale -> object array of palette surfaces
+        
+    def clear(self):
+        self.count = 0
+        
+    def allocate(self, count):
+        """Reserve room for up to count new particles and return their slice."""
+        count = min(count, self.budget - self.count)
+        if count <= 0:
+            return None
+        new = slice(self.count, self.count + count)
+        self.count += count
+        self.ages[new] = 0
+        return new
+        
+    def burst(self, x, y, count, speed, lifetime):
+        """Emit count particles from (x, y) in every direction."""
+        new = self.allocate(count)
+        if new is None:
+            return
+        count = new.stop - new.start
+        angles = np.random.uniform(0, 2 * math.pi, count)
+        speeds = np.random.uniform(speed[0], speed[1], count)
+        self.positions[new] = (x, y)
+        self.velocities[new, 0] = np.cos(angles) * speeds
+        self.velocities[new, 1] = np.sin(angles) * speeds
+        self.lifetimes[new] = np.random.uniform(lifetime[0], lifetime[1], count)
+        
+    def spray(self, rect, count, velocity, jitter, lifetime):
+        """Emit count particles at random points in rect moving at velocity +/- jitter."""
+        new = self.allocate(count)
+        if new is None:
+            return
+        count = new.stop - new.start
+        self.positions[new, 0] = np.random.uniform(rect.left, rect.right, count)
+        self.positions[new, 1] = np.random.uniform(rect.top, rect.bottom, count)
+        self.velocities[new] = np.random.uniform(-jitter, jitter, (count, 2)) + velocity
+        self.lifetimes[new] = np.random.uniform(lifetime[0], lifetime[1], count)
+        
+    def update(self, dt):
+        count = self.count
+        if not count:
+            return
+        self.ages[:count] += dt
+        if self.gravity:
+            self.velocities[:count, 1] += self.gravity * dt
+        self.positions[:count] += self.velocities[:count] * dt
+        
+        # Compact the arrays so live particles stay in [0, count)
+        alive = self.ages[:count] < self.lifetimes[:count]
+        if not alive.all():
+            keep = np.flatnonzero(alive)
+            for array in (self.positions, self.velocities, self.ages, self.lifetimes):
+                array[:len(keep)] = array[keep]
+            self.count = len(keep)
+            
+    def snapshot(self):
+        """Return a copy of the live particles that can be drawn while this system updates."""
+        snapshot = object.__new__(ParticleSystem)
+        snapshot.__dict__.update(self.__dict__)  # Shares the palette sprite cache
+        count = self.count
+        snapshot.positions = self.positions[:count].copy()
+        snapshot.ages = self.ages[:count].copy()
+        snapshot.lifetimes = self.lifetimes[:count].copy()
+        snapshot.velocities = None
+        return snapshot
+    
+    def get_sprites(self, scale):
+        sprites = self.sprites.get(scale)
+        if sprites is None:
+            size = (max(1, round(self.size[0] * scale)), max(1, round(self.size[1] * scale)))
+            sprites = np.empty(len(self.palette), dtype=object)
+            for i, color in enumerate(self.palette):
+                sprite = pygame.Surface(size)
+                sprite.fill(color)
+                sprites[i] = sprite
+            self.sprites[scale] = sprites
+        return sprites
+    
+    def draw(self, surface, scale=1.0, offset=(0, 0)):
+        """Draw at positions * scale - offset."""
+        count = self.count
+        if not count:
+            return
+        shades = (self.ages[:count] / self.lifetimes[:count] * len(self.palette)).astype(np.intp)
+        np.minimum(shades, len(self.palette) - 1, out=shades)
+        if surface.get_bytesize() == 4:
+            self.draw_pixels(surface, scale, shades, offset)
+        else:
+            self.draw_blits(surface, scale, shades, offset)
+            
+    def draw_pixels(self, surface, scale, shades, offset=(0, 0)):
+        """Write particles straight into the surface's pixels with vectorized stores."""
+        count = self.count
+        width = max(1, round(self.size[0] * scale))
+        height = max(1, round(self.size[1] * scale))
+        xs = (self.positions[:count, 0] * scale - offset[0]).astype(np.intp)
+        ys = (self.positions[:count, 1] * scale - offset[1]).astype(np.intp)
+        visible = (xs >= 0) & (ys >= 0) & (xs <= surface.get_width() - width) & (ys <= surface.get_height() - height)
+        xs, ys, shades = xs[visible], ys[visible], shades[visible]
+        colors = np.array([surface.map_rgb(color) for color in self.palette], np.uint32)[shades]
+        
+        pixels = pygame.surfarray.pixels2d(surface)
+        for dx in range(width):
+            for dy in range(height):
+                pixels[xs + dx, ys + dy] = colors
+        # Release the surface lock before anything else blits to it
+        del pixels
+        
+    def draw_blits(self, surface, scale, shades, offset=(0, 0)):
+        """Submit all particles as one batched blit sequence."""
+        sprites = self.get_sprites(scale)
+        positions = (self.positions[:self.count] * scale - offset).astype(np.int32).tolist()
+        blit_sequence = zip(sprites[shades], positions)
+        if hasattr(surface, 'fblits'):
+            surface.fblits(blit_sequence)
+        else:
+            surface.blits(blit_sequence, doreturn=False)
+
+#----------------------------------------------------------------------
+# RENDER QUEUE
+#----------------------------------------------------------------------
+
+class RenderQueue:
+    """
+    Collects a frame's (surface, position) pairs from every group, sorts them
+    by layer, and submits each run in one blits()/fblits() call. Within a
+    layer items keep their submission order, so overlapping sprites stack
+    the same way every frame. Draw callbacks (e.g. particles) keep their
+    place between layers.
+    """
+    def __init__(self):
+        self.items = []
+        
+    def add(self, surface, pos, layer=0):
+        # The item count keeps submission order within a layer and stops ties comparing surfaces
+        self.items.append((layer, len(self.items), surface, pos))
+        
+    def add_group(self, group, layer=0, lit=None):
+        """lit, if given, maps each sprite's image to the surface drawn (see Lighting.lit)."""
+        items = self.items
+        if lit:
+            for sprite in group:
+                image = lit(sprite.image)
+                items.append((layer, len(items), image, sprite.rect))
+            return
+        for sprite in group:
+            items.append((layer, len(items), sprite.image, sprite.rect))
+            
+    def add_callback(self, callback, layer=0):
+        """Call callback(target) at this layer, after everything below it is drawn."""
+        self.items.append((layer, len(self.items), None, callback))
+        
+    def flush(self, target):
+        self.items.sort()
+        batch = []
+        for _, _, surface, pos in self.items:
+            if surface is None:
+                self.submit(target, batch)
+                batch = []
+                pos(target)
+            else:
+                batch.append((surface, pos))
+        self.submit(target, batch)
+        self.items.clear()
+        
+    def submit(self, target, batch):
+        if not batch:
+            return
+        if hasattr(target, 'fblits'):
+            target.fblits(batch)
+        else:
+            target.blits(batch, doreturn=False)
+
+#----------------------------------------------------------------------
+# PARALLAX BACKGROUND
+#----------------------------------------------------------------------
+
+class ParallaxBackground:
+    """
+    Background layers scrolling at different speeds, drawn back to front.
+    Each layer is pre-tiled into a strip two screens wide, so a single blit
+    with an area rect covers the screen at any scroll offset. Opaque layers
+    are kept in the display format without alpha. While scrolling is paused
+    the layers are composed once into one surface, which is blitted instead.
+    snapshot() freezes the offsets for drawing on another thread.
+    """
+    def __init__(self, layers=PARALLAX_LAYERS, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.size = size
+        self.layers = []  # [ParallaxLayer, strip, offset]
+        for index, layer in enumerate(layers):
+            if index and not os.path.exists(layer.path):
+                continue
+            self.layers.append([layer, self.build_strip(layer.path, layer.opaque), 0.0])
+        self.paused = False
+        self.still_cache = [None]  # [((scale, offsets), composed surface)], shared with snapshots
+        
+    def build_strip(self, path, opaque):
+        width, height = self.size
+        image = load_image(path, self.size, not opaque)
+        strip = pygame.Surface((width * 2, height), image.get_flags(), image)
+        # MAX onto the zeroed strip copies pixels, alpha included, without blending
+        strip.blit(image, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        strip.blit(image, (width, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        return strip
+    
+    def reload(self, path):
+        """Rebuild the strip of every layer loaded from path."""
+        for entry in self.layers:
+            if entry[0].path == path:
+                entry[1] = self.build_strip(path, entry[0].opaque)
+        self.still_cache[0] = None
+        
+    def snapshot(self):
+        """Return a copy frozen at the current scroll offsets."""
+        snapshot = object.__new__(ParallaxBackground)
+        snapshot.__dict__.update(self.__dict__)
+        snapshot.layers = [list(entry) for entry in self.layers]
+        return snapshot
+        
+    def surfaces(self):
+        return [strip for _, strip, _ in self.layers]
+    
+    def scroll(self, distance):
+        """Move each layer by distance times its speed; a distance of 0 pauses scrolling."""
+        if not distance:
+            self.paused = True
+            return
+        self.paused = False
+        width = self.size[0]
+        for entry in self.layers:
+            entry[2] = (entry[2] + distance * entry[0].speed) % width
+            
+    def draw(self, target, scale=1.0, scaled=None, lighting=None):
+        """
+        Draw to target. scale and scaled() are used to draw at output
+        resolution, lighting (a Lighting) tints the layers.
+        """
+        lit = lighting.lit if lighting and lighting.tint != NEUTRAL_LIGHT else None
+        if not self.paused:
+            self.draw_layers(target, scale, scaled, lit)
+            return
+        key = (scale, tuple(offset for _, _, offset in self.layers), lighting.tint if lit else None)
+        still = self.still_cache[0]
+        if still is None or still[0] != key:
+            size = (round(self.size[0] * scale), round(self.size[1] * scale))
+            surface = pygame.Surface(size).convert()
+            self.draw_layers(surface, scale, scaled, lit)
+            still = self.still_cache[0] = (key, surface)
+        target.blit(still[1], (0, 0))
+        
+    def draw_layers(self, target, scale, scaled, lit=None):
+        area = pygame.Rect(0, 0, round(self.size[0] * scale), round(self.size[1] * scale))
+        for _, strip, offset in self.layers:
+            if lit:
+                strip = lit(strip)
+            if scaled:
+                strip = scaled(strip)
+            area.x = round(offset * scale)
+            target.blit(strip, (0, 0), area)
+
+#----------------------------------------------------------------------
+# DAY/NIGHT LIGHTING
+#----------------------------------------------------------------------
+
+# Function to interpolate the (multiply, add) tint at a phase of the day
+def lighting_tint(phase):
+    for (start, start_mult, start_add), (end, end_mult, end_add) in zip(LIGHTING_KEYFRAMES, LIGHTING_KEYFRAMES[1:]):
+        if start <= phase <= end:
+            t = (phase - start) / (end - start)
+            mult = tuple(round(a + (b - a) * t) for a, b in zip(start_mult, end_mult))
+            add = tuple(round(a + (b - a) * t) for a, b in zip(start_add, end_add))
+            return (mult, add)
+    return NEUTRAL_LIGHT
+
+class Lighting:
+    """
+    Day/night lighting in LIGHTING_BUCKETS fixed tints. lit() returns a
+    frame tinted with BLEND_RGB_MULT and BLEND_RGB_ADD fills, cached in an
+    LRU FrameStore, so frames are only tinted again after the bucket
+    changes. In full daylight frames are returned unchanged.
+    """
+    def __init__(self, buckets=LIGHTING_BUCKETS, day_length=DAY_LENGTH, budget=LIGHTING_CACHE_BUDGET):
+        self.tints = [lighting_tint(bucket / buckets) for bucket in range(buckets)]
+        self.day_length = day_length
+        self.bucket = 0
+        self.tint = self.tints[0]
+        self.cache = FrameStore(budget)
+        
+    def update(self, time_of_day):
+        """Pick the bucket for time_of_day (ms since the day started)."""
+        bucket = int(time_of_day % self.day_length * len(self.tints) // self.day_length)
+        if bucket != self.bucket:
+            self.bucket = bucket
+            self.tint = self.tints[bucket]
+            
+    def reset(self):
+        self.update(0)
+        
+    def snapshot(self):
+        """Return a copy fixed at the current tint, sharing the tint cache."""
+        snapshot = object.__new__(Lighting)
+        snapshot.__dict__.update(self.__dict__)
+        return snapshot
+    
+    def lit(self, frame):
+        tint = self.tint
+        if tint == NEUTRAL_LIGHT:
+            return frame
+        return self.cache.get_variant(frame, 'light', tint)
+    
+    def group_filter(self):
+        """Return lit for RenderQueue.add_group, or None in daylight."""
+        return self.lit if self.tint != NEUTRAL_LIGHT else None
+
+#----------------------------------------------------------------------
+# CAMERA
+#----------------------------------------------------------------------
+
+class Camera:
+    """
+    Pan and zoom over the 400x600 world. With no pan or zoom the scene is
+    drawn as usual. Otherwise sprites outside the view are culled first and
+    the rest are drawn from the mip level (power-of-two reductions built
+    lazily in an LRU FrameStore) just above the target size, with only a
+    nearest-neighbour scale on top, cached in the same store. The background
+    is composed at world size and its visible part scaled, only again after
+    it scrolls, the lighting changes or the view moves.
+    """
+    def __init__(self, mip_budget=CAMERA_MIP_BUDGET):
+        self.zoom = 1.0
+        self.center = (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+        self.mips = FrameStore(mip_budget)
+        self.render_queue = RenderQueue()
+        self.background_buffer = None
+        self.background_view = None  # (key, scaled visible background, position) of the last draw
+        self.pan_anchor = None  # World point held under the cursor while panning
+        self.culled = 0  # Sprites outside the view in the last draw
+        
+    def is_identity(self):
+        return self.zoom == 1.0 and self.center == (SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+    
+    def pose(self):
+        return (self.zoom, self.center)
+    
+    def origin(self):
+        """World position of the view's top-left corner."""
+        return (self.center[0] - SCREEN_WIDTH / 2 / self.zoom, self.center[1] - SCREEN_HEIGHT / 2 / self.zoom)
+    
+    def world_point(self, pos):
+        origin_x, origin_y = self.origin()
+        return (origin_x + pos[0] / self.zoom, origin_y + pos[1] / self.zoom)
+    
+    def to_world(self, pos):
+        """Convert a screen position to a world position."""
+        x, y = self.world_point(pos)
+        return (int(x), int(y))
+    
+    def look_at(self, anchor, pos):
+        """Move the view so world point anchor is under screen position pos."""
+        x = anchor[0] - (pos[0] - SCREEN_WIDTH / 2) / self.zoom
+        y = anchor[1] - (pos[1] - SCREEN_HEIGHT / 2) / self.zoom
+        self.center = (min(max(x, 0), SCREEN_WIDTH), min(max(y, 0), SCREEN_HEIGHT))
+        
+    def zoom_at(self, pos, factor):
+        """Zoom by factor, keeping the world point under pos in place."""
+        anchor = self.world_point(pos)
+        self.zoom = min(max(self.zoom * factor, CAMERA_ZOOM_RANGE[0]), CAMERA_ZOOM_RANGE[1])
+        if abs(self.zoom - 1.0) < 0.01:
+            self.zoom = 1.0  # Snap back to the unscaled fast path
+        self.look_at(anchor, pos)
+        
+    def start_pan(self, pos):
+        self.pan_anchor = self.world_point(pos)
+        
+    def pan_to(self, pos):
+        if self.pan_anchor:
+            self.look_at(self.pan_anchor, pos)
+            
+    def end_pan(self):
+        self.pan_anchor = None
+        
+    def mip(self, image):
+        """Return the smallest mip level of image still at least the zoomed size."""
+        level = 0
+        scale = self.zoom
+        while scale <= 0.5 and level < CAMERA_MAX_MIP_LEVEL:
+            scale *= 2
+            level += 1
+        return self.mips.get_variant(image, 'mip', level) if level else image
+    
+    def draw(self, target, world):
+        """Draw world (a Game or GameSnapshot) through the camera."""
+        zoom = self.zoom
+        origin_x, origin_y = self.origin()
+        view = pygame.Rect(int(origin_x), int(origin_y), math.ceil(SCREEN_WIDTH / zoom) + 1, math.ceil(SCREEN_HEIGHT / zoom) + 1)
+        offset = (origin_x * zoom, origin_y * zoom)
+        queue = self.render_queue
+        self.culled = 0
+        
+        self.draw_background(target, world.background, view, world.lighting)
+        lit = world.lighting.group_filter() if world.lighting else None
+        if world.ambient_particles:
+            queue.add_callback(lambda surface: world.ambient_particles.draw(surface, zoom, offset), LAYER_AMBIENT)
+        for group, layer, group_lit in ((world.all_sprites, LAYER_PET, lit), (world.fly_sprites, LAYER_FLIES, lit),
+                                        (world.explosion_sprites, LAYER_EFFECTS, None)):
+            for sprite in group:
+                rect = sprite.rect
+                if not view.colliderect(rect):
+                    self.culled += 1
+                    continue
+                size = (round(rect.width * zoom), round(rect.height * zoom))
+                if not size[0] or not size[1]:
+                    continue
+                image = self.mip(group_lit(sprite.image) if group_lit else sprite.image)
+                if image.get_size() != size:
+                    image = self.mips.get_variant(image, 'scale', size)
+                queue.add(image, (round(rect.x * zoom - offset[0]), round(rect.y * zoom - offset[1])), layer)
+        if world.effect_particles:
+            queue.add_callback(lambda surface: world.effect_particles.draw(surface, zoom, offset), LAYER_EFFECTS)
+        queue.flush(target)
+        
+    def draw_background(self, target, background, view, lighting=None):
+        origin_x, origin_y = self.origin()
+        key = (tuple(offset for _, _, offset in background.layers), lighting.tint if lighting else None,
+               self.zoom, origin_x, origin_y, tuple(background.surfaces()))
+        if self.background_view is None or self.background_view[0] != key:
+            if self.background_buffer is None:
+                self.background_buffer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+            background.draw(self.background_buffer, lighting=lighting)
+            visible = view.clip(self.background_buffer.get_rect())
+            if not visible:
+                self.background_view = (key, None, None)
+                return
+            size = (round(visible.width * self.zoom), round(visible.height * self.zoom))
+            position = (round((visible.x - origin_x) * self.zoom), round((visible.y - origin_y) * self.zoom))
+            self.background_view = (key, pygame.transform.scale(self.background_buffer.subsurface(visible), size), position)
+        _, scaled, position = self.background_view
+        if scaled:
+            target.blit(scaled, position)
+
 #----------------------------------------------------------------------
 # UI CLASSES AND FUNCTIONS
 #----------------------------------------------------------------------
@@ -669,25 +1758,38 @@ def create_menu_buttons():
 
 # Create and return game over buttons
 def create_game_over_buttons():
-    # Creating buttons with preset dimensions but their positions will be updated in draw_game_over
+    # Position buttons side by side at the bottom with proper spacing - smaller buttons
     button_width = 150  # Reduced from 200
     button_height = 40  # Reduced from 50
-    retry_button = Button(0, 0, button_width, button_height, "Retry", (0, 150, 0), (0, 200, 0))
-    exit_button = Button(0, 0, button_width, button_height, "Exit", (150, 0, 0), (200, 0, 0))
+    button_spacing = 40  # Slightly increased spacing between smaller buttons
+    total_width = (button_width * 2) + button_spacing
+    start_x = (SCREEN_WIDTH - total_width) // 2
+    
+    # Buttons sit higher to avoid potential overlap with the larger tombstone
+    retry_button = Button(start_x, SCREEN_HEIGHT - 120, button_width, button_height, "Retry", (0, 150, 0), (0, 200, 0))
+    exit_button = Button(start_x + button_width + button_spacing, SCREEN_HEIGHT - 120, button_width, button_height,
+                         "Exit", (150, 0, 0), (200, 0, 0))
     return retry_button, exit_button
 
-# Draw the menu screen
-def draw_menu(screen, logo_image, play_button, quit_button, background_image=None, background_scroll=0):
-    # Draw scrolling background if available
-    if background_image:
-        # Draw background with scrolling (draw two copies for seamless scrolling)
-        screen.blit(background_image, (background_scroll, 0))
-        screen.blit(background_image, (background_scroll + SCREEN_WIDTH, 0))
-    
-    # Draw a semi-transparent overlay with slightly less opacity
+# Function to build the menu's semi-transparent overlay once
+@functools.lru_cache(maxsize=1)
+def menu_overlay():
     overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 100))  # Reduced from 128 to 100 for better visibility
-    screen.blit(overlay, (0, 0))
+    overlay.fill((0, 0, 0, MENU_OVERLAY_ALPHA))
+    return overlay
+
+# Draw the menu screen
+def draw_menu(screen, logo_image, play_button, quit_button, background=None, translucent_overlay=True):
+    # Draw the background if available
+    if background:
+        background.draw(screen)
+    
+    # Darken the background behind the menu
+    if translucent_overlay:
+        screen.blit(menu_overlay(), (0, 0))
+    else:
+        # Cheaper solid panel behind the title, logo and description at reduced quality
+        screen.fill((0, 0, 0), (10, 20, SCREEN_WIDTH - 20, SCREEN_HEIGHT // 2 - 20))
     
     # Draw title with adjusted font size to ensure it fits
     menu_title_font = pygame.font.Font(None, 54)  # Reduced from 72 to 54 to ensure it fits
@@ -716,7 +1818,7 @@ def draw_menu(screen, logo_image, play_button, quit_button, background_image=Non
     quit_button.draw(screen)
 
 # Draw the game over screen
-def draw_game_over(screen, pet_age, retry_button, exit_button):
+def draw_game_over(screen, pet_age, retry_button, exit_button, best_age=None, translucent_overlay=True):
     # Display game over message - moved higher to make room
     large_font = pygame.font.Font(None, 48)
     game_over_text = large_font.render("Game Over", True, (255, 0, 0))
@@ -729,22 +1831,21 @@ def draw_game_over(screen, pet_age, retry_button, exit_button):
     final_age_rect = final_age_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 5 + 40))
     screen.blit(final_age_text, final_age_rect)
     
-    # Position buttons side by side at the bottom with proper spacing - smaller buttons
-    button_width = 150  # Reduced from 200
-    button_height = 40  # Reduced from 50
-    button_spacing = 40  # Slightly increased spacing between smaller buttons
-    total_width = (button_width * 2) + button_spacing
-    start_x = (SCREEN_WIDTH - total_width) // 2
-    
-    # Move buttons higher to avoid potential overlap with the larger tombstone
-    retry_button.rect = pygame.Rect(start_x, SCREEN_HEIGHT - 120, button_width, button_height)
-    exit_button.rect = pygame.Rect(start_x + button_width + button_spacing, SCREEN_HEIGHT - 120, button_width, button_height)
+    # Display the best lifespan from the lifetime records
+    if best_age is not None:
+        best_age_text = test_font.render(f"Longest life: {best_age} years", True, (255, 215, 0))
+        best_age_rect = best_age_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 5 + 65))
+        screen.blit(best_age_text, best_age_rect)
     
     # Add a semi-transparent background behind buttons for better visibility
     for button in [retry_button, exit_button]:
-        button_bg = pygame.Surface((button.rect.width + 10, button.rect.height + 10), pygame.SRCALPHA)
-        button_bg.fill((0, 0, 0, 128))
-        screen.blit(button_bg, (button.rect.x - 5, button.rect.y - 5))
+        if translucent_overlay:
+            button_bg = pygame.Surface((button.rect.width + 10, button.rect.height + 10), pygame.SRCALPHA)
+            button_bg.fill((0, 0, 0, 128))
+            screen.blit(button_bg, (button.rect.x - 5, button.rect.y - 5))
+        else:
+            # Cheaper solid fill at reduced quality
+            screen.fill((0, 0, 0), button.rect.inflate(10, 10))
     
     # Draw buttons
     retry_button.draw(screen)
@@ -778,8 +1879,7 @@ class Game:
         self.previous_pet_age = 0
         self.last_age_update = 0
         self.last_hunger_update = 0
-        self.background_scroll = 0
-        self.background_scroll_speed = 1
+        self.background = None
         
         # Sprite groups
         self.all_sprites = pygame.sprite.Group()
@@ -788,6 +1888,7 @@ class Game:
         self.tombstone_sprite = None
         
         # Game sprites
+        self.life_stage = LIFE_STAGES[0]
         self.egg_sprite = None
         self.baby_komodo_sprite = None
         self.teenage_sprite = None
@@ -795,92 +1896,133 @@ class Game:
         
         # Drag and drop
         self.dragging_fly = None
+        self.input_time = None  # perf_counter() time the newest handled input can have arrived (see FramePacer.get_events)
         
         # Game over state
         self.game_over_time = 0
         
+        # Particle effects (None when NumPy is not installed or particles are disabled)
+        self.effect_particles = None
+        self.ambient_particles = None
+        self.explosion_frames = {}  # Quality level name -> explosion frame lists, without particles
+        self.ambient_carry = 0.0
+        if np is not None and PARTICLES_ENABLED:
+            explosion = PARTICLE_EFFECTS['explosion']
+            self.effect_particles = ParticleSystem(PARTICLE_BUDGET, explosion['palette'], explosion['size'], explosion['gravity'])
+            if AMBIENT_EFFECT in AMBIENT_EMIT_RECTS:
+                ambient = PARTICLE_EFFECTS[AMBIENT_EFFECT]
+                self.ambient_particles = ParticleSystem(AMBIENT_PARTICLE_BUDGET, ambient['palette'], ambient['size'])
+        
+        # Batches the frame's blits into blits() calls
+        self.render_queue = RenderQueue()
+        
+        # Shared frame store for komodo and egg frames
+        self.frame_store = FrameStore()
+        self.display_stores = None  # Returns the display's {name: FrameStore}, set by main()
+        self.frame_set_reloads = {}  # First path of a set being reloaded -> [files read so far]
+        
+        # Asset loading state (see start_loading)
+        self.assets_loaded = False
+        self.asset_loading = None
+        
+        # Sound effects and music (silent if the mixer is not initialized)
+        self.sounds = SoundManager()
+        
+        # Runtime counters and gauges for monitoring
+        self.metrics = GameMetrics(self)
+        
+        # Development-mode asset watcher (None unless hot reload is enabled)
+        self.asset_watcher = AssetWatcher() if HOT_RELOAD_ENABLED else None
+        
+        # Current quality level, lowered by the frame-budget watchdog on slow machines
+        self.apply_quality(QUALITY_LEVELS[0])
+        
+        # Day/night lighting, following the time since the egg was laid
+        self.lighting = Lighting() if DAY_NIGHT_ENABLED else None
+        self.life_start_ticks = 0
+        
+        # Lifetime records and the stats of the current life
+        self.records = LifeRecords() if RECORDS_DB else None
+        self.life_started_at = time.time()
+        self.life_feeds = 0
+        self.life_min_hunger = 100
+        
     def load_assets(self):
+        for _ in self.load_assets_incrementally():
+            pass
+        
+    def load_assets_incrementally(self):
+        """Generator that loads assets one group per step, background first."""
         # Load background
-        self.background_image = load_image('graphics/background.png', (SCREEN_WIDTH, SCREEN_HEIGHT), False)
+        self.background = ParallaxBackground()
+        if self.asset_watcher:
+            for layer, _, _ in self.background.layers:
+                self.asset_watcher.watch(layer.path, self.reload_background)
+        yield
         
         # Load and create sprite frames
-        self.load_sprite_frames()
+        yield from self.load_sprite_frames()
+        
+        # Decode sound effects now so playing one never touches the disk
+        self.sounds.load()
+        self.sounds.play_music()
+        yield
         
         # Load tombstone image
-        try:
-            self.tombstone_image = load_image('graphics/tombstone.png', TOMBSTONE_SIZE)
-            print("Tombstone image loaded successfully")
-        except Exception as e:
-            print(f"Error loading tombstone image: {e}")
-            # Create a placeholder tombstone
-            self.tombstone_image = pygame.Surface(TOMBSTONE_SIZE, pygame.SRCALPHA)
-            pygame.draw.rect(self.tombstone_image, (100, 100, 100), (0, TOMBSTONE_SIZE[1]//2, TOMBSTONE_SIZE[0], TOMBSTONE_SIZE[1]//2))
-            pygame.draw.rect(self.tombstone_image, (80, 80, 80), (TOMBSTONE_SIZE[0]//4, 0, TOMBSTONE_SIZE[0]//2, TOMBSTONE_SIZE[1]//2), border_radius=15)
+        self.tombstone_image = load_tombstone_image()
+        
+        # Draw the explosions shown without particles, so none are drawn mid-game
+        if not self.effect_particles:
+            self.explosion_frames = {level.name: [build_explosion_frames(max(4, int(16 * level.explosion_scale)))
+                                                  for _ in range(EXPLOSION_VARIANTS)]
+                                     for level in QUALITY_LEVELS}
         
         # Create sprite instances
         self.create_sprites()
+        self.assets_loaded = True
+        
+        if GC_FREEZE_AFTER_LOAD:
+            # Assets live for the whole run; keep the collector from rescanning them
+            gc.collect()
+            gc.freeze()
+            logger.info(f"Froze {gc.get_freeze_count()} objects after loading")
+        
+        logger.info(f"Asset memory: {self.memory_report()['total'] / (1024 * 1024):.1f} MB")
+        
+    def start_loading(self):
+        """Load the background now and leave the rest for continue_loading()."""
+        self.asset_loading = self.load_assets_incrementally()
+        self.continue_loading()
+        
+    def continue_loading(self):
+        """Run one asset loading step."""
+        if self.asset_loading and next(self.asset_loading, StopIteration) is StopIteration:
+            self.asset_loading = None
+            
+    def finish_loading(self):
+        """Load whatever is left, for when the assets are needed right away."""
+        while self.asset_loading:
+            self.continue_loading()
         
     def load_sprite_frames(self):
+        """Generator that loads the fly, komodo and egg frames, one set per step."""
         # Load sprite sheet for flies
-        sprite_sheet = load_image('graphics/fly.png')
+        self.fly_frames = self.load_fly_frames()
+        if self.asset_watcher:
+            self.asset_watcher.watch(FLY_SHEET_PATH, self.reload_fly_frames)
+        yield
         
-        # Extract and scale fly frames
-        try:
-            self.fly_frames = extract_frames(sprite_sheet, 32, 32, 4)
-            self.fly_frames = [pygame.transform.scale(frame, (64, 64)) for frame in self.fly_frames]
-        except ValueError as e:
-            print(f"Error extracting frames: {e}")
-            # Create placeholder fly frames if extraction fails
-            self.fly_frames = []
-            for _ in range(4):
-                surf = pygame.Surface((32, 32), pygame.SRCALPHA)
-                pygame.draw.circle(surf, (0, 0, 0), (16, 16), 8)
-                self.fly_frames.append(surf)
-        
-        # Load teenage komodo frames
-        teenage_frames = [
-            load_image(f'graphics/midkomodowalking/komodoWalking{i}.png') for i in range(1, 5)
-        ]
-        self.teenage_frames = [pygame.transform.scale(frame, (250, 250)) for frame in teenage_frames]
-        
-        # Load baby komodo frames
-        baby_komodo_frames = [
-            load_image(f'graphics/Baby/babyKomodo{i}.png') for i in range(1, 5)
-        ]
-        self.baby_komodo_frames = [pygame.transform.scale(frame, (250, 250)) for frame in baby_komodo_frames]
-        
-        # Load old komodo frames
-        old_komodo_frames = [
-            load_image(f'graphics/oldkomodo/oldKomodo{i}.png') for i in range(1, 7)
-        ]
-        self.old_komodo_frames = [pygame.transform.scale(frame, (250, 250)) for frame in old_komodo_frames]
-        
-        # Load eating animation frames
-        komodo_eating_frames = [
-            load_image(f'graphics/midkomodoeating/komodoEating{i}.png') for i in range(1, 9)
-        ]
-        self.komodo_eating_frames = [pygame.transform.scale(frame, (250, 250)) for frame in komodo_eating_frames]
-        
-        baby_komodo_eating_frames = [
-            load_image(f'graphics/baby/babyKomodoEating{i}.png') for i in range(1, 5)
-        ]
-        self.baby_komodo_eating_frames = [pygame.transform.scale(frame, (250, 250)) for frame in baby_komodo_eating_frames]
-        
-        old_komodo_eating_frames = [
-            load_image(f'graphics/oldKomodoEating{i}.png') for i in range(1, 3)
-        ]
-        self.old_komodo_eating_frames = [pygame.transform.scale(frame, (250, 250)) for frame in old_komodo_eating_frames]
+        # Load komodo life stage and eating frames
+        for attr, (pattern, count) in SPRITE_FRAME_SETS.items():
+            setattr(self, attr, self.load_frame_set(pattern, count))
+            yield
         
         # Load egg frames
         try:
-            egg_frames = [
-                load_image(f'graphics/egg/komodoEgg{i}.png') for i in range(1, 4)
-            ]
+            self.egg_frames = self.load_frame_set(EGG_FRAME_PATTERN, EGG_FRAME_COUNT)
             print("Egg frames loaded successfully:")
-            for i, frame in enumerate(egg_frames):
+            for i, frame in enumerate(self.egg_frames):
                 print(f"Frame {i}: size={frame.get_size()}")
-            
-            self.egg_frames = [pygame.transform.scale(frame, (250, 250)) for frame in egg_frames]
         except Exception as e:
             print(f"Error loading egg frames: {e}")
             # Create placeholder egg frames
@@ -899,6 +2041,157 @@ class Game:
             self.egg_frames.append(hatching_egg)
             
             print("Created placeholder egg frames")
+        yield
+        
+    def load_fly_frames(self):
+        sprite_sheet = load_image(FLY_SHEET_PATH)
+        
+        # Extract and scale fly frames
+        try:
+            fly_frames = extract_frames(sprite_sheet, 32, 32, 4)
+            fly_frames = [pygame.transform.scale(frame, (64, 64)) for frame in fly_frames]
+        except ValueError as e:
+            print(f"Error extracting frames: {e}")
+            # Create placeholder fly frames if extraction fails
+            fly_frames = []
+            for _ in range(4):
+                surf = pygame.Surface((32, 32), pygame.SRCALPHA)
+                pygame.draw.circle(surf, (0, 0, 0), (16, 16), 8)
+                fly_frames.append(surf)
+        
+        fly_frames = FrameSet(fly_frames)
+        if FLY_HEADINGS:
+            fly_frames.rotations, fly_frames.rotation_offsets = build_rotations(fly_frames, FLY_HEADINGS)
+        return fly_frames
+    
+    def load_frame_set(self, pattern, count, size=SPRITE_FRAME_SIZE):
+        """Load numbered frames pattern.format(1..count) scaled to size."""
+        paths = [pattern.format(i) for i in range(1, count + 1)]
+        frames = FrameSet(self.frame_store.load(path, size) for path in paths)
+        
+        # Crop the set to its opaque area so draws skip the transparent border
+        if TRIM_SPRITE_FRAMES:
+            frames = trim_frame_set(frames)
+            for path, frame in zip(paths, frames):
+                self.frame_store.replace(path, size, frame)
+        
+        # Masks sit next to the frames so feeding hit tests never build one per event
+        frames.masks = [pygame.mask.from_surface(frame) for frame in frames]
+        
+        if self.asset_watcher:
+            for path in paths:
+                self.asset_watcher.watch(path, functools.partial(self.schedule_frame_set_reload, frames, paths, size))
+        return frames
+    
+    def schedule_frame_set_reload(self, frames, paths, size, path):
+        """Hot reload callback: reload the set path belongs to, once for any number of changed files."""
+        # A queued reload that has not read path yet will pick up the change; otherwise start over
+        progress = self.frame_set_reloads.get(paths[0])
+        if progress and paths.index(path) >= progress[0]:
+            return
+        progress = self.frame_set_reloads[paths[0]] = [0]
+        self.asset_watcher.schedule(paths[0], self.reload_frame_set(frames, paths, size, progress))
+        
+    def reload_frame_set(self, frames, paths, size, progress):
+        """
+        Generator that reloads a frame set one file per step, then re-trims it
+        (an edited frame can change the set's crop), swaps it in place and
+        patches live sprites. progress[0] counts the files read so far.
+        """
+        new_frames = FrameSet()
+        try:
+            for frame_path in paths:
+                progress[0] += 1  # Files after this one are read later
+                new_frames.append(load_image(frame_path, size))
+                yield
+        finally:
+            if self.frame_set_reloads.get(paths[0]) is progress:
+                del self.frame_set_reloads[paths[0]]
+        if TRIM_SPRITE_FRAMES:
+            new_frames = trim_frame_set(new_frames)
+        for frame_path, frame in zip(paths, new_frames):
+            self.frame_store.replace(frame_path, size, frame)
+        
+        # Slice assignment keeps the set shared with every sprite holding it
+        old_frames = list(frames)
+        frames[:] = new_frames
+        frames.offset = new_frames.offset
+        frames.trim_rect = new_frames.trim_rect
+        frames.masks = [pygame.mask.from_surface(frame) for frame in frames]
+        for index, (old_frame, new_frame) in enumerate(zip(old_frames, frames)):
+            self.swap_sprite_image(old_frame, new_frame, frame_mask(frames, index), frames.offset)
+        logger.info(f"Hot reloaded frame set: {paths[0]} (+{len(paths) - 1})")
+    
+    def reload_fly_frames(self, path):
+        """Hot reload callback for the fly sprite sheet."""
+        old_frames = list(self.fly_frames)
+        # Slice assignment keeps the list shared with every live FlySprite
+        new_frames = self.load_fly_frames()
+        self.fly_frames[:] = new_frames
+        self.fly_frames.rotations = new_frames.rotations
+        self.fly_frames.rotation_offsets = new_frames.rotation_offsets
+        for old_frame, new_frame in zip(old_frames, self.fly_frames):
+            self.swap_sprite_image(old_frame, new_frame)
+        for fly in self.fly_sprites:
+            fly.rotations = new_frames.rotations
+            fly.rotation_offsets = new_frames.rotation_offsets
+    
+    def reload_background(self, path):
+        """Hot reload callback for the background layers."""
+        self.background.reload(path)
+    
+    def memory_report(self):
+        """
+        Report pixel memory in bytes per asset, per life stage, for collision
+        masks, per variant cache and in total. Surfaces shared between assets
+        are only counted once in the total.
+        """
+        assets = {}
+        unique_surfaces = {}
+        named_assets = {attr: getattr(self, attr) for attr in list(SPRITE_FRAME_SETS) + ['egg_frames', 'fly_frames']}
+        named_assets['background'] = self.background.surfaces()
+        named_assets['tombstone_image'] = [self.tombstone_image]
+        named_assets['fly_rotations'] = [frame for row in self.fly_frames.rotations or [] for frame in row]
+        named_assets['explosion_frames'] = [frame for variants in self.explosion_frames.values()
+                                            for frames in variants for frame in frames]
+        for name, surfaces in named_assets.items():
+            assets[name] = sum(surface_bytes(surface) for surface in surfaces)
+            for surface in surfaces:
+                unique_surfaces[id(surface)] = surface_bytes(surface)
+        
+        stages = {stage: sum(assets[attr] for attr in attrs) for stage, attrs in LIFE_STAGE_FRAME_SETS.items()}
+        masks = {id(mask): mask_bytes(mask) for frames in named_assets.values() for mask in getattr(frames, 'masks', None) or []}
+        variants = {name: store.variant_bytes for name, store in self.variant_stores().items()}
+        return {
+            'assets': assets,
+            'stages': stages,
+            'masks': sum(masks.values()),
+            'variants': variants,
+            'total': sum(unique_surfaces.values()) + sum(masks.values()) + sum(variants.values()),
+        }
+    
+    def variant_stores(self):
+        """Return every FrameStore serving frames for this game, by name."""
+        stores = {'frames': self.frame_store}
+        if self.lighting:
+            stores['lighting'] = self.lighting.cache
+        if self.display_stores:
+            stores.update(self.display_stores())
+        return stores
+    
+    def swap_sprite_image(self, old_frame, new_frame, new_mask=None, offset=None):
+        """Point any live sprite currently showing old_frame at new_frame, re-anchored for offset if given."""
+        live_sprites = [self.egg_sprite, self.baby_komodo_sprite, self.teenage_sprite, self.old_komodo_sprite]
+        live_sprites.extend(self.fly_sprites)
+        for sprite in live_sprites:
+            if sprite is not None and sprite.image is old_frame:
+                sprite.image = new_frame
+                sprite.mask = new_mask
+                if offset is not None:
+                    center_x = sprite.rect.centerx - sprite.image_offset[0] + offset[0]
+                    center_y = sprite.rect.centery - sprite.image_offset[1] + offset[1]
+                    sprite.image_offset = offset
+                    sprite.rect = new_frame.get_rect(center=(center_x, center_y))
         
     def create_sprites(self):
         # Create animated sprites
@@ -915,6 +2208,7 @@ class Game:
         print("Creating new egg sprite during game initialization")
         self.egg_sprite = EggSprite(self.egg_frames, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100)
         self.all_sprites.add(self.egg_sprite)
+        self.life_stage = LIFE_STAGES[0]
         
     def create_tombstone(self):
         """Create a tombstone at the position of the current pet"""
@@ -923,29 +2217,76 @@ class Game:
         
         # Create the tombstone - position it lower on the screen
         tombstone_pos = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 120)
-        self.tombstone_sprite = TombstoneSprite(tombstone_pos[0], tombstone_pos[1])
+        self.tombstone_sprite = TombstoneSprite(tombstone_pos[0], tombstone_pos[1], self.tombstone_image)
         self.all_sprites.add(self.tombstone_sprite)
         
         # Create the flies that swarm around the tombstone
-        create_tombstone_flies(self.fly_frames, self.fly_sprites, tombstone_pos)
+        create_tombstone_flies(self.fly_frames, self.fly_sprites, tombstone_pos, self.quality.tombstone_flies)
         
         # Set game over time for timing effects
         self.game_over_time = pygame.time.get_ticks()
         
         # Create an explosion effect where the pet died
-        explosion = ExplosionSprite(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100)
-        self.explosion_sprites.add(explosion)
+        self.create_explosion(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100)
+        
+        # Record the life; the write happens on the records thread
+        if self.records:
+            self.records.record(self.life_started_at, time.time(), self.pet_age, self.life_feeds, self.life_min_hunger)
         
         print("Tombstone created - pet has died")
         
+    def enter_life_stage(self, stage):
+        """Show the stage's sprite and apply its fly speed; runs only on stage changes."""
+        self.life_stage = stage
+        self.all_sprites.empty()
+        self.all_sprites.add(getattr(self, stage.sprite_attr))
+        for fly in self.fly_sprites:
+            fly.update_pet_age(self.pet_age)
+        
+    def create_explosion(self, x, y):
+        """Burst of particles at (x, y), or the pre-drawn explosion sprite without NumPy."""
+        scale = self.quality.explosion_scale
+        if self.effect_particles:
+            effect = PARTICLE_EFFECTS['explosion']
+            self.effect_particles.burst(x, y, int(effect['count'] * scale), effect['speed'], effect['lifetime'])
+        else:
+            self.explosion_sprites.add(ExplosionSprite(x, y, random.choice(self.explosion_frames[self.quality.name])))
+    
+    def apply_quality(self, level):
+        """Switch to a QualityLevel; explosions and tombstone flies use it from their next creation."""
+        self.quality = level
+        self.background_scroll_speed = level.scroll_speed
+        AnimatedSprite.frame_time = level.animation_frame_time
+    
+    def update_particles(self, frame_scale):
+        dt = frame_scale / TARGET_FPS
+        if self.ambient_particles:
+            # Ambient effects only run over the scrolling habitat
+            if self.game_state == PLAYING and self.pet_age >= 1:
+                effect = PARTICLE_EFFECTS[AMBIENT_EFFECT]
+                self.ambient_carry += effect['rate'] * dt
+                count = int(self.ambient_carry)
+                self.ambient_carry -= count
+                self.ambient_particles.spray(AMBIENT_EMIT_RECTS[AMBIENT_EFFECT], count, effect['velocity'],
+                                             effect['jitter'], effect['lifetime'])
+            self.ambient_particles.update(dt)
+        if self.effect_particles:
+            self.effect_particles.update(dt)
+        
     def reset_game(self):
         self.previous_pet_age = 0
         self.pet_age = 0
         self.pet_hunger = 100
         self.game_state = PLAYING
+        self.life_started_at = time.time()
+        self.life_feeds = 0
+        self.life_min_hunger = 100
         
         # Set up the time values for age/hunger updates
         current_time = pygame.time.get_ticks()
+        self.life_start_ticks = current_time
+        if self.lighting:
+            self.lighting.reset()
         self.last_age_update = current_time + 5000  # 5 second delay before first age increment
         self.last_hunger_update = current_time
         
@@ -953,27 +2294,48 @@ class Game:
         print("Creating new egg sprite during game reset")
         self.egg_sprite = EggSprite(self.egg_frames, SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100)
         
-        # Clear all sprites and add the new egg sprite
-        self.all_sprites.empty()
-        self.all_sprites.add(self.egg_sprite)
-        
-        # Clear existing tombstone
+        # Clear existing tombstone and flies
         self.tombstone_sprite = None
-        
-        # Clear existing flies and create new ones
         self.fly_sprites.empty()
-        max_flies = get_max_flies(self.pet_age)
+        
+        # Clear all sprites and add the new egg sprite
+        self.enter_life_stage(get_life_stage(self.pet_age))
+        
+        # Create new flies
+        max_flies = self.life_stage.max_flies
         for _ in range(max_flies):
             create_fly(self.fly_frames, self.fly_sprites, self.pet_age, max_flies)
         
         # Clear any existing explosions
         self.explosion_sprites.empty()
-        
-    def update(self):
+        if self.effect_particles:
+            self.effect_particles.clear()
+        if self.ambient_particles:
+            self.ambient_particles.clear()
+        
+    def update(self, frame_scale=1.0, load_assets=True):
+        """
+        Advance the game by one frame. frame_scale is the frame's length in
+        60 FPS frames. With load_assets False, asset loading and hot reloads
+        are left to the caller (the simulation thread must not load images).
+        """
         now = pygame.time.get_ticks()
         
+        if load_assets:
+            # Finish loading assets in the background of the menu
+            if self.asset_loading:
+                self.continue_loading()
+            
+            # Pick up edited assets in development mode
+            if self.asset_watcher:
+                self.asset_watcher.poll()
+        
         # Update background scroll
         self.update_background_scroll()
+        
+        # Follow the day/night cycle while the pet is alive
+        if self.lighting and self.game_state == PLAYING:
+            self.lighting.update(now - self.life_start_ticks)
             
         # Only update game logic if in PLAYING state
         if self.game_state == PLAYING:
@@ -987,9 +2349,10 @@ class Game:
                     self.pet_age = 1
                     self.last_age_update = now
                     print(f"Egg hatched! Pet age advanced to {self.pet_age} years")
+                    self.metrics.hatches.inc()
+                    self.sounds.play('hatch')
                     # Create an explosion effect at the egg position
-                    explosion = ExplosionSprite(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100)
-                    self.explosion_sprites.add(explosion)
+                    self.create_explosion(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100)
             # Regular age updates for older pets
             elif now - self.last_age_update >= 3000:
                 self.pet_age += 1
@@ -1000,48 +2363,38 @@ class Game:
                 if self.previous_pet_age < 10 and self.pet_age >= 10:
                     # Transition from baby to teenage
                     print("Transforming from baby to teenage komodo!")
-                    explosion = ExplosionSprite(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100)
-                    self.explosion_sprites.add(explosion)
+                    self.sounds.play('stage_change')
+                    self.create_explosion(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100)
                 elif self.previous_pet_age < 20 and self.pet_age >= 20:
                     # Transition from teenage to old
                     print("Transforming from teenage to old komodo!")
-                    explosion = ExplosionSprite(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100)
-                    self.explosion_sprites.add(explosion)
+                    self.sounds.play('stage_change')
+                    self.create_explosion(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 100)
+            
+            # Swap sprites and fly parameters only when the pet changes stage
+            if self.pet_age != self.previous_pet_age:
+                stage = get_life_stage(self.pet_age)
+                if stage is not self.life_stage:
+                    self.enter_life_stage(stage)
             
             # Update the hunger level - only when the egg has hatched
-            hunger_interval = get_hunger_interval(self.pet_age)
+            hunger_interval = self.life_stage.hunger_interval
             if self.pet_age >= 1:  # Only decrease hunger if egg has hatched
                 if now - self.last_hunger_update >= hunger_interval:
                     self.pet_hunger = max(0, self.pet_hunger - 10)
+                    self.life_min_hunger = min(self.life_min_hunger, self.pet_hunger)
                     self.last_hunger_update = now
                     print(f"Pet hunger: {self.pet_hunger}%")
                     
                     # Check if pet has starved
                     if self.pet_hunger <= 0:
                         self.game_state = GAME_OVER
+                        self.metrics.deaths.inc()
+                        self.sounds.play('death')
                         self.create_tombstone()  # Create tombstone when pet dies
             else:
                 # Ensure hunger stays at 100% while in egg stage
                 self.pet_hunger = 100
-                
-            # Update active sprite based on age
-            # Only update living sprites if still playing and not transitioning to game over
-            if self.game_state == PLAYING and self.pet_hunger > 0:
-                self.all_sprites.empty()
-                
-                if self.pet_age < 1:
-                    # Add egg sprite to be rendered
-                    self.all_sprites.add(self.egg_sprite)
-                elif self.pet_age < 10:
-                    self.all_sprites.add(self.baby_komodo_sprite)
-                elif self.pet_age < 20:
-                    self.all_sprites.add(self.teenage_sprite)
-                else:
-                    self.all_sprites.add(self.old_komodo_sprite)
-            
-            # Update flies' pet_age to adjust their behavior
-            for fly in self.fly_sprites:
-                fly.update_pet_age(self.pet_age)
         
         # Special animation for game over state with the tombstone
         if self.game_state == GAME_OVER and self.tombstone_sprite:
@@ -1052,18 +2405,12 @@ class Game:
                 
         # Update all sprite groups
         self.all_sprites.update()
-        self.fly_sprites.update()
+        self.fly_sprites.update(frame_scale)
         self.explosion_sprites.update()
+        self.update_particles(frame_scale)
         
     def draw(self, screen):
-        # Draw scrolling background
-        screen.blit(self.background_image, (self.background_scroll, 0))
-        screen.blit(self.background_image, (self.background_scroll + SCREEN_WIDTH, 0))
-        
-        # Draw all sprites
-        self.all_sprites.draw(screen)
-        self.fly_sprites.draw(screen)
-        self.explosion_sprites.draw(screen)
+        draw_scene(screen, self)
         
         # For debugging - visualize the fly boundary around tombstone
         if self.game_state == GAME_OVER and self.tombstone_sprite and False:  # Set to True to enable debug visualization
@@ -1080,45 +2427,26 @@ class Game:
                     
     def handle_mouse_up(self, mouse_pos):
         if self.dragging_fly and self.game_state == PLAYING:
-            # Check if the fly is dropped over the lizard
-            current_lizard = None
-            if self.pet_age < 1:
-                # Use the animated egg sprite for collision detection
-                if self.egg_sprite.rect.collidepoint(mouse_pos):
+            # Check if the fly is dropped over the pet of the current life stage
+            stage = self.life_stage
+            pet_sprite = getattr(self, stage.sprite_attr)
+            if collide_sprite_point(pet_sprite, mouse_pos):
+                if stage.name == 'egg':
                     print("Fed the egg!")
-                    self.pet_hunger = min(self.pet_hunger + 20, 100)
-                    self.dragging_fly.kill()
-                    # Only create a new fly if there are fewer than max allowed flies
-                    max_flies = get_max_flies(self.pet_age)
-                    if len(self.fly_sprites) < max_flies:
-                        create_fly(self.fly_frames, self.fly_sprites, self.pet_age, max_flies)
-                    self.dragging_fly = None
-                    
                     # Trigger a shake effect when the egg is fed
-                    self.egg_sprite.shake_amount = 5
-            else:
-                # Check which lizard sprite to use based on age
-                if self.pet_age < 10:
-                    current_lizard = self.baby_komodo_sprite
-                    print("Baby komodo will eat")
-                elif self.pet_age < 20:
-                    current_lizard = self.teenage_sprite
-                    print("Teenage komodo will eat")
+                    pet_sprite.shake_amount = 5
                 else:
-                    current_lizard = self.old_komodo_sprite
-                    print("Old komodo will eat")
-                
-                if current_lizard and current_lizard.rect.collidepoint(mouse_pos):
                     print(f"Fed the lizard! (Age: {self.pet_age})")
-                    # Explicitly trigger eating animation with debug
-                    current_lizard.start_eating()
-                    self.pet_hunger = min(self.pet_hunger + 20, 100)
-                    self.dragging_fly.kill()
-                    # Create a new fly to replace the eaten one if not exceeding max
-                    max_flies = get_max_flies(self.pet_age)
-                    if len(self.fly_sprites) < max_flies:
-                        create_fly(self.fly_frames, self.fly_sprites, self.pet_age, max_flies)
-                    self.dragging_fly = None
+                    pet_sprite.start_eating()
+                self.sounds.play('eat')
+                self.metrics.feeds.inc()
+                self.life_feeds += 1
+                self.pet_hunger = min(self.pet_hunger + 20, 100)
+                self.dragging_fly.kill()
+                # Create a new fly to replace the eaten one if not exceeding max
+                if len(self.fly_sprites) < stage.max_flies:
+                    create_fly(self.fly_frames, self.fly_sprites, self.pet_age, stage.max_flies)
+                self.dragging_fly = None
             
             # If not dropped on lizard, return fly to original position
             if self.dragging_fly:
@@ -1130,6 +2458,28 @@ class Game:
         if self.dragging_fly:
             self.dragging_fly.update_drag_position(mouse_pos)
             
+    def screen_name(self):
+        """Name of the screen currently shown, used for per-screen statistics."""
+        if self.game_state == MENU:
+            return 'menu'
+        if self.game_state == GAME_OVER:
+            return 'game_over'
+        return 'egg' if self.pet_age < 1 else 'playing'
+    
+    def activity_level(self):
+        """How much of the screen changes on its own, used by the frame pacer."""
+        if self.asset_loading:
+            return PACE_ACTIVE
+        if self.explosion_sprites or (self.effect_particles and self.effect_particles.count):
+            return PACE_ACTIVE
+        if self.game_state == MENU:
+            # The menu background does not scroll; only input changes the menu
+            return PACE_STATIC
+        if self.game_state == PLAYING and self.pet_age >= 1:
+            return PACE_ACTIVE
+        # Egg stage and tombstone: background is still, only small sprites move
+        return PACE_AMBIENT
+        
     def update_background_scroll(self):
         # Check if we should scroll the background
         should_scroll = True
@@ -1147,24 +2497,1386 @@ class Game:
             should_scroll = False
         
         # Update background position for scrolling effect if needed
-        if should_scroll:
-            self.background_scroll -= self.background_scroll_speed
-            # Reset when the first background has completely scrolled off-screen
-            if self.background_scroll <= -SCREEN_WIDTH:
-                self.background_scroll = 0
+        self.background.scroll(self.background_scroll_speed if should_scroll else 0)
+
+#----------------------------------------------------------------------
+# THREADED SIMULATION
+#----------------------------------------------------------------------
+
+# What a snapshot keeps of a sprite: the frame shown and where
+SpriteView = namedtuple('SpriteView', 'image rect')
+
+class GameSnapshot:
+    """
+    A copy of everything the renderer reads from a Game, taken after a
+    simulation step. It has the same drawing attributes as Game, so
+    draw_screen() and Display draw it the same way. It also carries the
+    camera pose and button hover colors of the simulation thread's input
+    handler; show_ui() copies them onto the camera and buttons the render
+    thread draws.
+    """
+    __slots__ = ('game_state', 'pet_age', 'pet_hunger', 'background', 'ambient_particles',
+                 'effect_particles', 'all_sprites', 'fly_sprites', 'explosion_sprites',
+                 'tombstone_sprite', 'records', 'quality', 'lighting', 'input_time', 'render_queue',
+                 'camera_pose', 'button_colors')
+    
+    def __init__(self, game, render_queue, input_handler=None):
+        self.game_state = game.game_state
+        self.pet_age = game.pet_age
+        self.pet_hunger = game.pet_hunger
+        self.background = game.background.snapshot()
+        self.ambient_particles = game.ambient_particles.snapshot() if game.ambient_particles else None
+        self.effect_particles = game.effect_particles.snapshot() if game.effect_particles else None
+        self.all_sprites = tuple(SpriteView(sprite.image, sprite.rect.copy()) for sprite in game.all_sprites)
+        self.fly_sprites = tuple(SpriteView(sprite.image, sprite.rect.copy()) for sprite in game.fly_sprites)
+        self.explosion_sprites = tuple(SpriteView(sprite.image, sprite.rect.copy()) for sprite in game.explosion_sprites)
+        self.tombstone_sprite = None
+        self.records = game.records  # Only best_age is read, which the records thread sets atomically
+        self.quality = game.quality
+        self.lighting = game.lighting.snapshot() if game.lighting else None
+        self.input_time = game.input_time
+        self.render_queue = render_queue  # Owned by the render thread
+        camera = input_handler.camera if input_handler else None
+        self.camera_pose = camera.pose() if camera else None
+        self.button_colors = tuple(button.current_color for button in input_handler.buttons) if input_handler else ()
+        
+    def draw(self, screen):
+        draw_scene(screen, self)
+        
+    def show_ui(self, camera, buttons):
+        """Apply the snapshot's camera pose and button hover colors to the render thread's camera and buttons."""
+        if camera and self.camera_pose:
+            camera.zoom, camera.center = self.camera_pose
+        for button, color in zip(buttons, self.button_colors):
+            button.current_color = color
+
+class Simulation:
+    """
+    Runs input handling and Game.update on a background thread at
+    SIMULATION_RATE steps per second. Input arrives through a deque
+    (append and popleft are atomic, so no lock is taken) and every step
+    publishes a GameSnapshot into a double buffer that the render thread
+    reads with latest(). Drawing and blitting release the GIL inside
+    pygame, so a slow frame on one side no longer holds up the other.
+    Surfaces are only created on the main thread: assets finish loading
+    before the thread starts, and hot reloads run between steps under lock.
+    The input handler hovers its own buttons and moves its own camera, so
+    the render thread only sees their state through snapshots.
+    """
+    def __init__(self, game, input_handler, rate=SIMULATION_RATE):
+        self.game = game
+        self.input_handler = input_handler
+        input_handler.on_quit = self.request_quit
+        self.step_time = 1.0 / rate
+        self.input_queue = deque()
+        self.render_queue = RenderQueue()
+        self.snapshots = [GameSnapshot(game, self.render_queue, input_handler), None]
+        self.front = 0
+        self.quit_requested = False
+        self.running = False
+        self.thread = threading.Thread(target=self.run, name='simulation', daemon=True)
+        self.lock = threading.Lock()  # Held for each step; the main thread takes it to swap in reloaded assets
+        
+    def start(self):
+        self.running = True
+        self.thread.start()
+        
+    def stop(self):
+        self.running = False
+        if self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+            
+    def request_quit(self):
+        # pygame has to shut down on the main thread, which checks this flag
+        self.quit_requested = True
+        
+    def post(self, events, input_time=None):
+        """Queue input events, arrived after input_time, for the next simulation step."""
+        if events:
+            self.input_queue.append((input_time, events))
+        
+    def latest(self):
+        """Return the most recently published snapshot."""
+        return self.snapshots[self.front]
+    
+    def publish(self, snapshot):
+        back = 1 - self.front
+        self.snapshots[back] = snapshot
+        self.front = back
+        
+    def run(self):
+        next_step = time.perf_counter()
+        while self.running:
+            self.step()
+            next_step += self.step_time
+            delay = next_step - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -5 * self.step_time:
+                # Fell far behind; drop the backlog rather than fast-forwarding
+                next_step = time.perf_counter()
+                
+    def step(self):
+        events = []
+        input_queue = self.input_queue
+        while input_queue:
+            input_time, batch = input_queue.popleft()
+            events.extend(batch)
+            self.game.input_time = input_time
+        with self.lock:
+            self.input_handler.process(events)
+            self.game.update(load_assets=False)
+            self.publish(GameSnapshot(self.game, self.render_queue, self.input_handler))
+
+#----------------------------------------------------------------------
+# FRAME PACING
+#----------------------------------------------------------------------
+
+class FramePacer:
+    """
+    Chooses the frame rate from how much of the screen is changing.
+    Active screens run at TARGET_FPS, ambient screens at a reduced rate with
+    fly motion scaled up to match, and static screens block on
+    pygame.event.wait until input arrives. Any input ramps back to full rate.
+    Also tracks CPU time per screen.
+    """
+    def __init__(self, clock, enabled=FRAME_PACING_ENABLED, vsync=False):
+        self.clock = clock
+        self.enabled = enabled
+        self.vsync = vsync  # flip() already waits for the display, so full rate is not capped again
+        self.level = PACE_ACTIVE
+        self.frame_scale = 1.0
+        self.last_input_time = 0
+        self.drained_at = time.perf_counter()  # When the event queue was last emptied
+        self.input_arrival = None  # Earliest time this frame's events can have arrived
+        self.screen_times = {}  # screen name -> [cpu seconds, wall seconds]
+        self.last_cpu_time = time.process_time()
+        self.last_wall_time = time.perf_counter()
+        
+    def get_events(self):
+        """
+        Return this frame's events, sleeping until input or timeout on static
+        screens. input_arrival is set to the earliest time they can have
+        arrived: pygame events carry no timestamp, so events read after a
+        frame are stamped with the previous read, which counts the time they
+        waited in the queue during update, draw and the pacing sleep.
+        """
+        if self.level == PACE_STATIC:
+            event = pygame.event.wait(PACER_IDLE_WAIT)
+            self.drained_at = time.perf_counter()  # The waking event arrived just now
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events.extend(pygame.event.get())
+        else:
+            events = pygame.event.get()
+        self.input_arrival = self.drained_at
+        self.drained_at = time.perf_counter()
+        
+        if events:
+            self.last_input_time = pygame.time.get_ticks()
+        return events
+    
+    def tick(self, activity, screen_name):
+        """End the frame: record CPU usage and wait for the next frame at the chosen rate."""
+        self.record_cpu(screen_name)
+        if not self.enabled:
+            self.clock.tick(0 if self.vsync else TARGET_FPS)
+            return
+        
+        if pygame.time.get_ticks() - self.last_input_time < PACER_INPUT_HOLD:
+            activity = PACE_ACTIVE
+        self.level = activity
+        
+        if activity == PACE_STATIC:
+            # get_events() does the waiting so input wakes the loop immediately
+            self.frame_scale = 1.0
+            self.clock.tick()
+        else:
+            fps = PACER_FPS[activity]
+            self.frame_scale = TARGET_FPS / fps
+            self.clock.tick(0 if self.vsync and fps == TARGET_FPS else fps)
+            
+    def record_cpu(self, screen_name):
+        cpu_time = time.process_time()
+        wall_time = time.perf_counter()
+        totals = self.screen_times.setdefault(screen_name, [0.0, 0.0])
+        totals[0] += cpu_time - self.last_cpu_time
+        totals[1] += wall_time - self.last_wall_time
+        self.last_cpu_time = cpu_time
+        self.last_wall_time = wall_time
+        
+    def cpu_report(self):
+        """Return CPU usage in percent of one core for each screen shown so far."""
+        return {name: 100 * cpu / wall for name, (cpu, wall) in self.screen_times.items() if wall > 0}
+    
+    def log_cpu_report(self):
+        report = self.cpu_report()
+        if report:
+            usage = ', '.join(f"{name} {percent:.1f}%" for name, percent in sorted(report.items()))
+            logger.info(f"CPU usage per screen: {usage}")
+
+#----------------------------------------------------------------------
+# FRAME BUDGET WATCHDOG
+#----------------------------------------------------------------------
+
+class FrameBudgetWatchdog:
+    """
+    Keeps a rolling average of per-frame work time (input, update, draw and
+    flip, without the pacing sleep or vsync wait) over WATCHDOG_WINDOW
+    frames. Quality steps down one QUALITY_LEVELS entry when the average
+    exceeds the frame budget, and back up after WATCHDOG_UP_HOLD windows of
+    headroom. Every level gets a full window before it is judged.
+    Transitions are logged and kept in transitions.
+    """
+    def __init__(self, game, budget=1.0 / TARGET_FPS, window=WATCHDOG_WINDOW):
+        self.game = game
+        self.budget = budget
+        self.samples = [0.0] * window
+        self.index = 0
+        self.total = 0.0
+        self.frames_at_level = 0
+        self.transitions = []  # (time, from level name, to level name, average seconds)
+        
+    def observe(self, work_time):
+        samples = self.samples
+        self.total += work_time - samples[self.index]
+        samples[self.index] = work_time
+        self.index = (self.index + 1) % len(samples)
+        self.frames_at_level += 1
+        if self.frames_at_level < len(samples):
+            return
+        
+        average = self.total / len(samples)
+        level = QUALITY_LEVELS.index(self.game.quality)
+        if average > self.budget * WATCHDOG_STEP_DOWN and level < len(QUALITY_LEVELS) - 1:
+            self.change_level(level + 1, average)
+        elif (average < self.budget * WATCHDOG_STEP_UP and level > 0
+              and self.frames_at_level >= len(samples) * WATCHDOG_UP_HOLD):
+            self.change_level(level - 1, average)
+            
+    def change_level(self, index, average):
+        old = self.game.quality
+        new = QUALITY_LEVELS[index]
+        self.game.apply_quality(new)
+        self.frames_at_level = 0
+        self.transitions.append((time.time(), old.name, new.name, average))
+        logger.info(f"Quality {old.name} -> {new.name} (average frame work {average * 1000:.1f} ms, "
+                    f"budget {self.budget * 1000:.1f} ms)")
+
+#----------------------------------------------------------------------
+# METRICS
+#----------------------------------------------------------------------
+
+class Counter:
+    """Monotonic counter. inc() is a plain attribute add, cheap enough for every frame."""
+    def __init__(self):
+        self.value = 0
+        
+    def inc(self, amount=1):
+        self.value += amount
+
+class Gauge:
+    """Value read at export time, from set() or from a callback."""
+    def __init__(self, callback=None):
+        self.value = 0
+        self.callback = callback
+        
+    def set(self, value):
+        self.value = value
+        
+    def read(self):
+        return self.callback() if self.callback else self.value
+
+class Summary:
+    """Sum, count and a ring buffer of recent samples; quantiles are computed at export time."""
+    def __init__(self, window=METRICS_WINDOW):
+        self.samples = [0.0] * window
+        self.index = 0
+        self.count = 0
+        self.sum = 0.0
+        
+    def observe(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+        self.sum += value
+        
+    def quantiles(self, quantiles=METRICS_QUANTILES):
+        recent = sorted(self.samples[:min(self.count, len(self.samples))])
+        if not recent:
+            return {quantile: 0.0 for quantile in quantiles}
+        return {quantile: recent[min(len(recent) - 1, int(quantile * len(recent)))] for quantile in quantiles}
+
+class MetricsRegistry:
+    """Named metrics rendered in the Prometheus text exposition format."""
+    def __init__(self):
+        self.metrics = {}  # name -> (kind, help, metric)
+        
+    def counter(self, name, help_text):
+        return self.register(name, 'counter', help_text, Counter())
+    
+    def gauge(self, name, help_text, callback=None):
+        return self.register(name, 'gauge', help_text, Gauge(callback))
+    
+    def summary(self, name, help_text):
+        return self.register(name, 'summary', help_text, Summary())
+    
+    def register(self, name, kind, help_text, metric):
+        self.metrics[name] = (kind, help_text, metric)
+        return metric
+    
+    def render(self):
+        lines = []
+        for name, (kind, help_text, metric) in self.metrics.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                lines.append(f"{name} {metric.value}")
+            elif kind == 'gauge':
+                lines.append(f"{name} {metric.read()}")
+            else:
+                for quantile, value in metric.quantiles().items():
+                    lines.append(f'{name}{{quantile="{quantile}"}} {value:.6f}')
+                lines.append(f"{name}_sum {metric.sum:.6f}")
+                lines.append(f"{name}_count {metric.count}")
+        return "\n".join(lines) + "\n"
+
+class GameMetrics:
+    """The game's metrics, registered once and updated from Game and main()."""
+    def __init__(self, game):
+        self.game = game
+        self.registry = MetricsRegistry()
+        self.frames = self.registry.counter('komodo_frames_rendered_total', 'Frames rendered.')
+        self.frame_time = self.registry.summary('komodo_frame_time_seconds', 'Time between displayed frames.')
+        self.frame_work = self.registry.summary('komodo_frame_work_seconds', 'Input, update and draw time per frame.')
+        self.input_latency = self.registry.summary('komodo_input_latency_seconds', 'Time from input arriving (at the latest, the previous event read) to flipping the frame that shows it.')
+        self.latched_input_latency = self.registry.summary('komodo_latched_input_latency_seconds', 'Time from late-latching a dragged fly to flipping the frame that shows it.')
+        self.feeds = self.registry.counter('komodo_feeds_total', 'Flies fed to the pet.')
+        self.hatches = self.registry.counter('komodo_hatches_total', 'Eggs hatched.')
+        self.deaths = self.registry.counter('komodo_deaths_total', 'Pets that starved.')
+        self.captured_frames = self.registry.counter('komodo_capture_frames_total', 'Frames handed to the capture workers.')
+        self.capture_dropped = self.registry.counter('komodo_capture_dropped_frames_total', 'Frames skipped because capture fell behind.')
+        self.registry.gauge('komodo_live_sprites', 'Sprites in the game groups.', self.live_sprites)
+        self.registry.gauge('komodo_asset_cache_hit_ratio', 'Variant cache hit ratio over the lighting, camera mip and display asset stores.', self.cache_hit_ratio)
+        self.registry.gauge('komodo_quality_level', 'Adaptive quality level, 0 is full quality.', self.quality_level)
+        
+    def live_sprites(self):
+        game = self.game
+        return len(game.all_sprites) + len(game.fly_sprites) + len(game.explosion_sprites)
+    
+    def quality_level(self):
+        return QUALITY_LEVELS.index(self.game.quality)
+    
+    def cache_hit_ratio(self):
+        stores = self.game.variant_stores().values()
+        hits = sum(store.hits for store in stores)
+        lookups = hits + sum(store.misses for store in stores)
+        return hits / lookups if lookups else 0.0
+    
+    def log_input_latency(self):
+        for name, latency in (("Input to flip", self.input_latency), ("Late latch to flip", self.latched_input_latency)):
+            if latency.count:
+                quantiles = ', '.join(f"p{round(quantile * 100)} {value * 1000:.1f} ms"
+                                      for quantile, value in latency.quantiles().items())
+                logger.info(f"{name} latency over {latency.count} frames: {quantiles}")
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry = None  # Set on the subclass created by MetricsExporter
+    
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the game log
+
+class MetricsExporter:
+    """
+    Publishes a registry from background daemon threads so the game loop
+    never waits on disk or network: a file rewritten every
+    METRICS_EXPORT_INTERVAL seconds and/or an HTTP endpoint on localhost.
+    """
+    def __init__(self, registry, path=METRICS_FILE, port=METRICS_PORT):
+        self.registry = registry
+        self.path = path
+        self.port = None
+        self.server = None
+        if port:
+            # A bad KOMODO_METRICS_PORT turns the endpoint off rather than stopping the game
+            try:
+                self.port = int(port)
+            except ValueError:
+                self.port = -1
+            if not 0 <= self.port < 65536:
+                logger.warning(f"Invalid metrics port {port!r}, expected 1-65535; not serving metrics")
+                self.port = None
+        
+    def start(self):
+        if self.path:
+            threading.Thread(target=self.write_loop, name='metrics-file', daemon=True).start()
+        if self.port:
+            handler = type('BoundMetricsRequestHandler', (MetricsRequestHandler,), {'registry': self.registry})
+            try:
+                self.server = ThreadingHTTPServer(('127.0.0.1', self.port), handler)
+            except OSError as e:
+                logger.warning(f"Could not serve metrics on port {self.port}: {e}")
+                return
+            threading.Thread(target=self.server.serve_forever, name='metrics-http', daemon=True).start()
+            logger.info(f"Serving metrics on http://127.0.0.1:{self.port}/metrics")
+            
+    def write_loop(self):
+        while True:
+            self.write_file()
+            time.sleep(METRICS_EXPORT_INTERVAL)
+            
+    def write_file(self):
+        # Write then rename so scrapers never read a half-written file
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w') as metrics_file:
+                metrics_file.write(self.registry.render())
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to write metrics to {self.path}: {e}")
+
+#----------------------------------------------------------------------
+# LIFETIME RECORDS
+#----------------------------------------------------------------------
+
+class LifeRecords:
+    """
+    Keeps every pet's life in a SQLite database in WAL mode. record() only
+    queues the row: a background thread owns the write connection, writes
+    whatever is queued in one transaction and then refreshes best_age for
+    the game-over screen. The thread and the database file are created on
+    the first death. Leaderboard queries use their own connection, which
+    WAL lets read while the writer is busy.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS lives (
+            id INTEGER PRIMARY KEY,
+            started_at REAL NOT NULL,
+            died_at REAL NOT NULL,
+            final_age INTEGER NOT NULL,
+            feeds INTEGER NOT NULL,
+            min_hunger INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS lives_by_age ON lives (final_age DESC, died_at);
+        CREATE INDEX IF NOT EXISTS lives_by_death ON lives (died_at);
+    """
+    
+    def __init__(self, path=RECORDS_DB, batch_size=RECORDS_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = queue.Queue()
+        self.thread = None
+        self.best_age = None
+        
+    def record(self, started_at, died_at, final_age, feeds, min_hunger):
+        """Queue one life for writing."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.write_loop, name='life-records', daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+        self.pending.put((started_at, died_at, final_age, feeds, min_hunger))
+        
+    def connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')  # Durable enough for WAL, no fsync per commit
+        connection.executescript(self.SCHEMA)
+        return connection
+    
+    def write_loop(self):
+        try:
+            connection = self.connect()
+            self.best_age = connection.execute('SELECT MAX(final_age) FROM lives').fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Could not open lifetime records {self.path}: {e}")
+            return
+        
+        while True:
+            rows = [self.pending.get()]
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            closing = None in rows
+            rows = [row for row in rows if row is not None]
+            if rows:
+                try:
+                    with connection:
+                        connection.executemany(
+                            'INSERT INTO lives (started_at, died_at, final_age, feeds, min_hunger) VALUES (?, ?, ?, ?, ?)',
+                            rows)
+                    self.best_age = connection.execute('SELECT MAX(final_age) FROM lives').fetchone()[0]
+                except sqlite3.Error as e:
+                    logger.error(f"Could not write {len(rows)} lifetime records: {e}")
+            if closing:
+                connection.close()
+                return
+            
+    def close(self):
+        """Write anything still queued and stop the thread."""
+        if self.thread and self.thread.is_alive():
+            self.pending.put(None)
+            self.thread.join()
+            
+    def query(self, sql, parameters=()):
+        connection = self.connect()
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+            
+    def top_lifespans(self, limit=10):
+        """Return the longest lives as (final_age, feeds, started_at, died_at) rows."""
+        return self.query('SELECT final_age, feeds, started_at, died_at FROM lives '
+                          'ORDER BY final_age DESC, died_at LIMIT ?', (limit,))
+    
+    def daily_stats(self, days=7):
+        """Return (day, lives, average age, longest life, feeds) rows for the last days, newest first."""
+        since = time.time() - days * 86400
+        return self.query("SELECT date(died_at, 'unixepoch', 'localtime') AS day, COUNT(*), AVG(final_age), "
+                          "MAX(final_age), SUM(feeds) FROM lives WHERE died_at >= ? "
+                          "GROUP BY day ORDER BY day DESC", (since,))
+
+#----------------------------------------------------------------------
+# FRAME PROFILER
+#----------------------------------------------------------------------
+
+class FrameProfiler:
+    """
+    Profiles the next PROFILE_FRAMES frames on request. cProfile runs only
+    between frame_start() and frame_end(), so pacing sleeps are left out,
+    and a sampling thread records the stacks of the profiled threads
+    (the main thread, plus the simulation thread in threaded mode) while
+    a frame is in progress. Each run writes a timestamped .pstats file and
+    a .collapsed file of "frame;frame;frame count" lines for flame graph
+    tools. Only the newest PROFILE_KEEP runs are kept. Until request() is
+    called the main loop only checks the active flag.
+    """
+    def __init__(self, directory=PROFILE_DIR, frames=PROFILE_FRAMES, keep=PROFILE_KEEP,
+                 sample_interval=PROFILE_SAMPLE_INTERVAL):
+        self.directory = directory
+        self.frames = frames
+        self.keep = keep
+        self.sample_interval = sample_interval
+        self.thread_ids = [threading.main_thread().ident]
+        self.active = False  # A run is requested or in progress
+        self.profile = None
+        self.remaining = 0
+        self.in_frame = False
+        self.stacks = {}  # Collapsed stack -> sample count
+        self.sampler = None
+        self.runs = 0
+        
+    def request(self):
+        """Profile the next frames. Safe to call from a signal handler or another thread."""
+        self.active = True
+        
+    def add_thread(self, thread):
+        """Also sample thread's stacks (cProfile only sees the main thread)."""
+        self.thread_ids.append(thread.ident)
+        
+    def frame_start(self):
+        if self.profile is None:
+            logger.info(f"Profiling the next {self.frames} frames")
+            self.profile = cProfile.Profile()
+            self.remaining = self.frames
+            self.stacks = {}
+            self.sampler = threading.Thread(target=self.sample, name='profile-sampler', daemon=True)
+            self.sampler.start()
+        self.in_frame = True
+        self.profile.enable()
+        
+    def frame_end(self):
+        self.profile.disable()
+        self.in_frame = False
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.finish()
+            
+    def sample(self):
+        profile = self.profile
+        while self.profile is profile:
+            if self.in_frame:
+                frames = sys._current_frames()
+                for thread_id in self.thread_ids:
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    names = []
+                    while frame is not None:
+                        code = frame.f_code
+                        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    stack = ';'.join(reversed(names))
+                    self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            time.sleep(self.sample_interval)
+            
+    def finish(self):
+        profile, self.profile = self.profile, None  # Also stops the sampler
+        self.active = False
+        self.sampler.join()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Milliseconds and a run counter keep runs apart and in order when sorted by name
+            now = time.time()
+            self.runs += 1
+            stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}-{self.runs:03d}"
+            base = os.path.join(self.directory, f"komodo-{stamp}")
+            profile.dump_stats(base + '.pstats')
+            with open(base + '.collapsed', 'w') as collapsed:
+                for stack, count in sorted(self.stacks.items()):
+                    collapsed.write(f"{stack} {count}\n")
+            logger.info(f"Profile of {self.frames} frames written to {base}.pstats and {base}.collapsed")
+            self.rotate()
+        except OSError as e:
+            logger.error(f"Could not write profile to {self.directory}: {e}")
+            
+    def rotate(self):
+        """Delete all but the newest keep runs."""
+        runs = sorted({os.path.splitext(name)[0] for name in os.listdir(self.directory) if name.startswith('komodo-')})
+        for run in runs[:-self.keep]:
+            for extension in ('.pstats', '.collapsed'):
+                path = os.path.join(self.directory, run + extension)
+                if os.path.exists(path):
+                    os.remove(path)
+
+#----------------------------------------------------------------------
+# ALLOCATION PROFILER
+#----------------------------------------------------------------------
+
+class AllocationProfiler:
+    """
+    Instrumentation mode for allocation and GC spikes. Every frame records
+    the net bytes and memory blocks allocated and the transient peak above
+    the frame's starting point (tracemalloc). Every ALLOC_SNAPSHOT_INTERVAL
+    frames, snapshots at the frame's start and end are compared by line to
+    attribute what the frame allocated to call sites. gc.callbacks time
+    every collection against the frame it happened in. close() logs a
+    summary and writes the full report as JSON.
+    """
+    def __init__(self, report_path=ALLOC_REPORT, snapshot_interval=ALLOC_SNAPSHOT_INTERVAL):
+        self.report_path = report_path
+        self.snapshot_interval = snapshot_interval
+        self.frame = 0
+        self.frames = []  # (net bytes, peak bytes, net blocks) per frame
+        self.sites = {}  # "file:line" -> [bytes, blocks] over sampled frames
+        self.sampled_frames = 0
+        self.gc_pauses = []  # (frame, generation, seconds, collected)
+        self.gc_start = None
+        self.snapshot = None
+        self.closed = False
+        self.reset_peak = getattr(tracemalloc, 'reset_peak', None)  # Python 3.9+; peaks are not tracked before
+        
+    def start(self):
+        tracemalloc.start()
+        gc.callbacks.append(self.on_gc)
+        
+    def on_gc(self, phase, info):
+        if phase == 'start':
+            self.gc_start = time.perf_counter()
+        elif self.gc_start is not None:
+            self.gc_pauses.append((self.frame, info['generation'], time.perf_counter() - self.gc_start, info['collected']))
+            self.gc_start = None
+            
+    def take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    
+    def frame_start(self):
+        if self.frame % self.snapshot_interval == 0:
+            self.snapshot = self.take_snapshot()
+        if self.reset_peak:
+            self.reset_peak()
+        self.start_bytes = tracemalloc.get_traced_memory()[0]
+        self.start_blocks = sys.getallocatedblocks()
+        
+    def frame_end(self):
+        current, peak = tracemalloc.get_traced_memory()
+        if not self.reset_peak:
+            peak = max(current, self.start_bytes)  # The peak covers the whole run, not this frame
+        self.frames.append((current - self.start_bytes, peak - self.start_bytes, sys.getallocatedblocks() - self.start_blocks))
+        if self.snapshot:
+            for stat in self.take_snapshot().compare_to(self.snapshot, 'lineno'):
+                if stat.size_diff > 0 or stat.count_diff > 0:
+                    frame = stat.traceback[0]
+                    site = self.sites.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+                    site[0] += stat.size_diff
+                    site[1] += stat.count_diff
+            self.sampled_frames += 1
+            self.snapshot = None
+        self.frame += 1
+        
+    def report(self):
+        frame_count = max(1, len(self.frames))
+        top_sites = sorted(self.sites.items(), key=lambda item: item[1][0], reverse=True)[:ALLOC_TOP_SITES]
+        pauses = [pause[2] for pause in self.gc_pauses]
+        return {
+            'frames': len(self.frames),
+            'bytes_per_frame': sum(frame[0] for frame in self.frames) / frame_count,
+            'peak_bytes_per_frame': sum(frame[1] for frame in self.frames) / frame_count,
+            'blocks_per_frame': sum(frame[2] for frame in self.frames) / frame_count,
+            'sites': [{'site': site, 'bytes_per_frame': size / max(1, self.sampled_frames),
+                       'blocks_per_frame': blocks / max(1, self.sampled_frames)}
+                      for site, (size, blocks) in top_sites],
+            'gc': {
+                'threshold': gc.get_threshold(),
+                'frozen': gc.get_freeze_count(),
+                'collections': len(pauses),
+                'total_seconds': sum(pauses),
+                'max_seconds': max(pauses, default=0.0),
+                'pauses': [{'frame': frame, 'generation': generation, 'seconds': seconds, 'collected': collected}
+                           for frame, generation, seconds, collected in self.gc_pauses],
+            },
+        }
+    
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+        report = self.report()
+        tracemalloc.stop()
+        gc_report = report['gc']
+        logger.info(f"Allocations: {report['frames']} frames, {report['bytes_per_frame']:.0f} B net and "
+                    f"{report['peak_bytes_per_frame']:.0f} B peak per frame; {gc_report['collections']} GC pauses, "
+                    f"max {gc_report['max_seconds'] * 1000:.2f} ms (threshold {gc_report['threshold']}, "
+                    f"{gc_report['frozen']} frozen)")
+        for site in report['sites'][:5]:
+            logger.info(f"  {site['site']}: {site['bytes_per_frame']:.0f} B/frame")
+        try:
+            with open(self.report_path, 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+        except OSError as e:
+            logger.error(f"Could not write allocation report {self.report_path}: {e}")
+
+#----------------------------------------------------------------------
+# VITALS RECORDER
+#----------------------------------------------------------------------
+
+class VitalsRecorder:
+    """
+    Records one sample per frame into preallocated NumPy columns.
+    The columns form a ring of VITALS_CHUNKS chunks. When a chunk fills, a
+    background thread copies it into memory-mapped .npy files (one per
+    column) while the game keeps writing into the next chunk. If the writer
+    falls so far behind that the next chunk is still waiting to be written,
+    the chunk just filled is dropped and counted in overruns rather than
+    stalling the frame. Recording a sample
+    only stores scalars into existing arrays. Read a session back with
+    load_vitals().
+    """
+    def __init__(self, directory, chunk_size=VITALS_CHUNK_SIZE):
+        self.directory = os.path.join(directory, time.strftime('%Y%m%d-%H%M%S'))
+        os.makedirs(self.directory, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.columns = {name: np.zeros(chunk_size * VITALS_CHUNKS, dtype) for name, dtype in VITALS_COLUMNS}
+        # Direct references for the per-frame path
+        self.timestamps = self.columns['timestamp']
+        self.ages = self.columns['age']
+        self.hungers = self.columns['hunger']
+        self.states = self.columns['state']
+        self.stages = self.columns['stage']
+        self.flies = self.columns['flies']
+        self.feeds = self.columns['feeds']
+        self.frame_times = self.columns['frame_time']
+        self.index = 0
+        self.chunk_start = 0
+        self.chunk_number = 0
+        self.spill_queue = queue.Queue()
+        self.spill_slots = threading.Semaphore(VITALS_CHUNKS - 1)  # Held by each chunk until it is written
+        self.overruns = 0
+        self.spill_thread = threading.Thread(target=self.spill_loop, name='vitals-spill', daemon=True)
+        self.spill_thread.start()
+        self.closed = False
+        logger.info(f"Recording vitals to {self.directory}")
+        
+    def record(self, game, frame_time):
+        i = self.index
+        self.timestamps[i] = time.time()
+        self.ages[i] = game.pet_age
+        self.hungers[i] = game.pet_hunger
+        self.states[i] = game.game_state
+        self.stages[i] = LIFE_STAGE_BY_AGE[min(game.pet_age, len(LIFE_STAGE_BY_AGE) - 1)]
+        self.flies[i] = len(game.fly_sprites)
+        self.feeds[i] = game.life_feeds
+        self.frame_times[i] = frame_time
+        
+        i += 1
+        if i - self.chunk_start == self.chunk_size:
+            self.spill(i)
+            i = self.chunk_start
+        self.index = i
+        
+    def spill(self, end, wait=False):
+        """Hand samples [chunk_start, end) to the spill thread and start the next chunk."""
+        # The next chunk reuses the slots of the oldest spill. If that is
+        # still waiting, drop this chunk and record over it again
+        if end > self.chunk_start:
+            if not self.spill_slots.acquire(blocking=wait):
+                self.overruns += 1
+                return
+            self.spill_queue.put((self.chunk_number, self.chunk_start, end))
+            self.chunk_number += 1
+        self.chunk_start = end % len(self.timestamps)
+        
+    def spill_loop(self):
+        while True:
+            item = self.spill_queue.get()
+            if item is None:
+                return
+            self.write_chunk(*item)
+            self.spill_slots.release()
+            
+    def write_chunk(self, number, start, end):
+        for name, dtype in VITALS_COLUMNS:
+            path = os.path.join(self.directory, f"{name}.{number:05d}.npy")
+            chunk = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(end - start,))
+            chunk[:] = self.columns[name][start:end]
+            chunk.flush()
+            del chunk
+            
+    def close(self):
+        """Spill the partial chunk and wait for all chunks to be written."""
+        if self.closed:
+            return
+        self.closed = True
+        self.spill(self.index, wait=True)
+        self.spill_queue.put(None)
+        self.spill_thread.join()
+        if self.overruns:
+            logger.warning(f"Dropped {self.overruns} vitals chunks of {self.chunk_size} samples while earlier chunks were still being written")
+
+# Function to read a recorded vitals session as {column name: array}
+def load_vitals(directory):
+    columns = {}
+    for name, dtype in VITALS_COLUMNS:
+        chunk_files = sorted(file_name for file_name in os.listdir(directory)
+                             if file_name.startswith(name + '.') and file_name.endswith('.npy'))
+        chunks = [np.load(os.path.join(directory, file_name), mmap_mode='r') for file_name in chunk_files]
+        if len(chunks) == 1:
+            columns[name] = chunks[0]
+        else:
+            columns[name] = np.concatenate(chunks) if chunks else np.zeros(0, dtype)
+    return columns
+
+#----------------------------------------------------------------------
+# GAMEPLAY CAPTURE
+#----------------------------------------------------------------------
+
+# pygame.image.tobytes is new in pygame 2.1.3; older versions call it tostring
+image_tobytes = getattr(pygame.image, 'tobytes', None) or pygame.image.tostring
+
+# Function to write RGB24 pixels as a PNG. pygame.image.save holds the GIL
+# while encoding, zlib.compress releases it, so this keeps workers off the game thread
+def write_png(path, width, height, rgb, level=CAPTURE_PNG_LEVEL):
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    
+    stride = width * 3
+    rows = b''.join(b'\0' + rgb[y:y + stride] for y in range(0, height * stride, stride))  # Filter type 0 per row
+    with open(path, 'wb') as png_file:
+        png_file.write(b'\x89PNG\r\n\x1a\n')
+        png_file.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        png_file.write(chunk(b'IDAT', zlib.compress(rows, level)))
+        png_file.write(chunk(b'IEND', b''))
+
+class FrameCapture:
+    """
+    Records the window without stalling the game loop. capture() copies
+    the frame into one of CAPTURE_BUFFERS reused surfaces and queues it;
+    worker threads encode PNG files (see write_png) or write raw RGB
+    frames into a single file at fixed offsets. If every buffer is still being encoded the frame
+    is dropped and counted instead of waiting.
+    """
+    def __init__(self, directory, size, image_format=CAPTURE_FORMAT, workers=CAPTURE_WORKERS,
+                 buffers=CAPTURE_BUFFERS, metrics=None):
+        self.directory = os.path.join(directory, time.strftime('%Y%m%d-%H%M%S'))
+        os.makedirs(self.directory, exist_ok=True)
+        self.format = image_format
+        self.size = size
+        self.metrics = metrics
+        self.frame_number = 0
+        self.dropped = 0
+        
+        self.free_buffers = queue.Queue()
+        for _ in range(buffers):
+            self.free_buffers.put(pygame.Surface(size))
+        self.pending = queue.Queue(maxsize=buffers)  # Never full: only as many items as buffers
+        
+        self.raw_file = None
+        if self.format == 'raw':
+            # One file of back-to-back RGB24 frames, e.g.
+            # ffmpeg -f rawvideo -pixel_format rgb24 -video_size 400x600 -framerate 60 -i frames.rgb out.mp4
+            self.raw_file = open(os.path.join(self.directory, 'frames.rgb'), 'wb')
+            self.raw_lock = threading.Lock()
+            with open(os.path.join(self.directory, 'frames.json'), 'w') as info_file:
+                json.dump({'pixel_format': 'rgb24', 'width': size[0], 'height': size[1]}, info_file)
+        
+        self.workers = [threading.Thread(target=self.work, name=f'capture-{i}', daemon=True)
+                        for i in range(workers)]
+        for worker in self.workers:
+            worker.start()
+        self.closed = False
+        logger.info(f"Capturing {self.format} frames to {self.directory}")
+        
+    def capture(self, surface):
+        """Queue a copy of surface, or drop it if the workers are behind."""
+        try:
+            buffer = self.free_buffers.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            if self.metrics:
+                self.metrics.capture_dropped.inc()
+            return
+        buffer.blit(surface, (0, 0))
+        self.pending.put_nowait((self.frame_number, buffer))
+        self.frame_number += 1
+        if self.metrics:
+            self.metrics.captured_frames.inc()
+            
+    def work(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            number, buffer = item
+            try:
+                self.write_frame(number, buffer)
+            except (pygame.error, OSError) as e:
+                logger.error(f"Could not write capture frame {number}: {e}")
+            self.free_buffers.put(buffer)
+            
+    def write_frame(self, number, buffer):
+        data = image_tobytes(buffer, 'RGB')
+        if self.raw_file is not None:
+            with self.raw_lock:
+                self.raw_file.seek(number * len(data))
+                self.raw_file.write(data)
+        else:
+            write_png(os.path.join(self.directory, f"frame_{number:06d}.png"), *self.size, data)
+            
+    def close(self):
+        """Finish the queued frames and stop the workers."""
+        if self.closed:
+            return
+        self.closed = True
+        for _ in self.workers:
+            self.pending.put(None)
+        for worker in self.workers:
+            worker.join()
+        if self.raw_file is not None:
+            self.raw_file.close()
+        logger.info(f"Captured {self.frame_number} frames, dropped {self.dropped}")
+
+#----------------------------------------------------------------------
+# DISPLAY
+#----------------------------------------------------------------------
+
+class Display:
+    """
+    Owns the window and presents the 400x600 logical frame on it.
+    In 'window' and 'scaled' mode the game draws straight to the display
+    surface (SDL does the single per-frame scale in 'scaled' mode).
+    In 'native' mode the background and sprites are drawn at the output
+    resolution from a cache of pre-scaled assets keyed by resolution, and the
+    UI is drawn at logical size and only rescaled when it changes.
+    """
+    def __init__(self, mode=DISPLAY_MODE, resolution=DISPLAY_RESOLUTION, fullscreen=DISPLAY_FULLSCREEN,
+                 vsync=DISPLAY_VSYNC):
+        self.mode = mode
+        flags = pygame.FULLSCREEN if fullscreen else 0
+        if vsync and mode == 'native':
+            logger.warning("KOMODO_VSYNC is not supported in native display mode")
+            vsync = False
+        
+        if mode == 'native':
+            if resolution:
+                size = tuple(int(value) for value in resolution.lower().split('x'))
+            else:
+                size = pygame.display.get_desktop_sizes()[0]
+            self.window = pygame.display.set_mode(size, flags)
+            # Uniform scale with the logical frame centered (letterboxed)
+            self.scale = min(size[0] / SCREEN_WIDTH, size[1] / SCREEN_HEIGHT)
+            view_size = (round(SCREEN_WIDTH * self.scale), round(SCREEN_HEIGHT * self.scale))
+            view_rect = pygame.Rect((0, 0), view_size)
+            view_rect.center = (size[0] // 2, size[1] // 2)
+            self.view = self.window.subsurface(view_rect)
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        else:
+            if mode == 'scaled':
+                flags |= pygame.SCALED
+            self.window = None
+            if vsync:
+                # SDL only honors vsync for SCALED (or OpenGL) windows
+                try:
+                    self.window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), flags | pygame.SCALED, vsync=1)
+                except pygame.error as e:
+                    logger.warning(f"Vsync is not available, presenting without it: {e}")
+            if self.window is None:
+                vsync = False
+                self.window = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), flags)
+            self.scale = 1.0
+            self.view = self.window
+            self.screen = self.window
+        
+        self.vsync = vsync
+        
+        # The camera draws the logical frame, so it is not used in native mode
+        self.camera = Camera() if CAMERA_ENABLED and mode != 'native' else None
+        
+        self.asset_caches = {}  # output resolution -> FrameStore of scaled assets
+        self.ui_key = None
+        self.scaled_ui = None
+        
+    def variant_stores(self):
+        """Return the camera mip store and the native scaled asset stores, by name."""
+        stores = {f"native_{width}x{height}": store for (width, height), store in list(self.asset_caches.items())}
+        if self.camera:
+            stores['camera_mips'] = self.camera.mips
+        return stores
+    
+    def scaled(self, surface):
+        """Return surface scaled to the output resolution, scaling it only once."""
+        cache = self.asset_caches.get(self.view.get_size())
+        if cache is None:
+            cache = FrameStore(NATIVE_ASSET_BUDGET)
+            self.asset_caches[self.view.get_size()] = cache
+        width, height = surface.get_size()
+        return cache.get_variant(surface, 'scale', (round(width * self.scale), round(height * self.scale)))
+    
+    def to_logical(self, pos):
+        """Convert a window position to a logical 400x600 position."""
+        if self.mode != 'native':
+            return pos
+        offset_x, offset_y = self.view.get_abs_offset()
+        return (int((pos[0] - offset_x) / self.scale), int((pos[1] - offset_y) / self.scale))
+        
+    def render(self, game, logo_image, menu_buttons, game_over_buttons):
+        if self.mode != 'native':
+            draw_screen(self.screen, game, logo_image, menu_buttons, game_over_buttons, self.camera)
+            return
+        
+        self.window.fill((0, 0, 0))
+        self.draw_world(game)
+        
+        # The UI only changes with state, stats and button hover, so rescale it only then
+        buttons = menu_buttons + game_over_buttons
+        best_age = game.records.best_age if game.records else None
+        ui_key = (game.game_state, game.pet_age, game.pet_hunger, best_age, game.quality,
+                  tuple(button.current_color for button in buttons))
+        if ui_key != self.ui_key:
+            self.ui_key = ui_key
+            self.screen.fill((0, 0, 0, 0))
+            if game.game_state == MENU:
+                draw_menu(self.screen, logo_image, *menu_buttons)
+            elif game.game_state == PLAYING:
+                draw_playing_ui(self.screen, game.pet_age, game.pet_hunger)
+            elif game.game_state == GAME_OVER:
+                draw_game_over(self.screen, game.pet_age, *game_over_buttons, best_age=best_age,
+                               translucent_overlay=game.quality.translucent_overlay)
+            self.scaled_ui = pygame.transform.smoothscale(self.screen, self.view.get_size())
+        self.view.blit(self.scaled_ui, (0, 0))
+        
+    def draw_world(self, game):
+        """Draw the background and sprites at output resolution."""
+        game.background.draw(self.view, self.scale, self.scaled, game.lighting)
+        if game.game_state == MENU:
+            return
+        
+        if game.ambient_particles:
+            game.ambient_particles.draw(self.view, self.scale)
+        lit = game.lighting.group_filter() if game.lighting else None
+        for group, group_lit in ((game.all_sprites, lit), (game.fly_sprites, lit), (game.explosion_sprites, None)):
+            for sprite in group:
+                image = group_lit(sprite.image) if group_lit else sprite.image
+                self.view.blit(self.scaled(image), (round(sprite.rect.x * self.scale), round(sprite.rect.y * self.scale)))
+        if game.effect_particles:
+            game.effect_particles.draw(self.view, self.scale)
+
+#----------------------------------------------------------------------
+# STARTUP TIMELINE
+#----------------------------------------------------------------------
+
+class StartupTimeline:
+    """
+    Seconds from the start of the module import to each startup milestone:
+    import, init, first_frame and loaded. Logged once everything is loaded
+    and appended to STARTUP_LOG so startup can be tracked across releases.
+    """
+    def __init__(self, start=IMPORT_START, log_path=STARTUP_LOG):
+        self.start = start
+        self.log_path = log_path
+        self.marks = {}
+        self.finished = False
+        
+    def mark(self, name):
+        self.marks[name] = time.perf_counter() - self.start
+        
+    def after_frame(self, assets_loaded):
+        """Call after each displayed frame until finished."""
+        if 'first_frame' not in self.marks:
+            self.mark('first_frame')
+        if assets_loaded:
+            self.mark('loaded')
+            self.finished = True
+            self.report()
+            
+    def report(self):
+        logger.info("Startup timeline: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.marks.items()))
+        if self.log_path:
+            entry = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'fast_startup': FAST_STARTUP}
+            entry.update({name: round(seconds, 4) for name, seconds in self.marks.items()})
+            try:
+                with open(self.log_path, 'a') as log_file:
+                    log_file.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                logger.error(f"Failed to write startup timeline to {self.log_path}: {e}")
+
+#----------------------------------------------------------------------
+# INPUT HANDLING
+#----------------------------------------------------------------------
+
+# Function to shut down pygame and leave the program
+def quit_game():
+    pygame.quit()
+    exit()
+
+class InputHandler:
+    """
+    Dispatches queued input through a table keyed by game state and event type.
+    Only the events the game uses are allowed into the queue, and mouse motion
+    is collapsed to the latest position so a burst of motion events costs one
+    hover/drag update per frame.
+    """
+    ALLOWED_EVENTS = [pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION,
+                      pygame.MOUSEWHEEL, pygame.MULTIGESTURE, pygame.KEYDOWN]
+    
+    def __init__(self, game, menu_buttons, game_over_buttons, map_pos=None, on_quit=quit_game, camera=None,
+                 on_profile=None):
+        self.game = game
+        self.map_pos = map_pos  # Converts window positions to logical 400x600 positions
+        self.on_quit = on_quit
+        self.camera = camera  # Game input is converted to world positions through it
+        self.on_profile = on_profile  # Called when PROFILE_HOTKEY is pressed
+        self.play_button, self.quit_button = menu_buttons
+        self.retry_button, self.exit_button = game_over_buttons
+        self.buttons = tuple(menu_buttons) + tuple(game_over_buttons)
+        self.handlers = {
+            MENU: {
+                pygame.MOUSEBUTTONDOWN: self.menu_mouse_down,
+                pygame.MOUSEMOTION: self.menu_mouse_motion,
+            },
+            PLAYING: {
+                pygame.MOUSEBUTTONDOWN: game.handle_mouse_down,
+                pygame.MOUSEBUTTONUP: game.handle_mouse_up,
+                pygame.MOUSEMOTION: game.handle_mouse_motion,
+            },
+            GAME_OVER: {
+                pygame.MOUSEBUTTONDOWN: self.game_over_mouse_down,
+                pygame.MOUSEMOTION: self.game_over_mouse_motion,
+            },
+        }
+        
+    def install(self):
+        """Block every event type the game does not handle."""
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(self.ALLOWED_EVENTS)
+        
+    def process(self, events):
+        """Handle one frame's worth of events."""
+        motion_pos = None
+        for event in events:
+            if event.type == pygame.MOUSEMOTION:
+                motion_pos = event.pos
+                continue
+            if event.type == pygame.QUIT:
+                self.on_quit()
+            elif event.type == pygame.KEYDOWN:
+                if event.key == PROFILE_HOTKEY and self.on_profile:
+                    self.on_profile()
+            elif self.camera and (event.type in (pygame.MOUSEWHEEL, pygame.MULTIGESTURE) or (
+                    event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP) and event.button > 1)):
+                # Other buttons, the wheel and pinches drive the camera
+                if motion_pos is not None:
+                    self.dispatch(pygame.MOUSEMOTION, motion_pos)
+                    motion_pos = None
+                self.camera_event(event)
+            elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+                # Deliver pending motion first so a drop lands where the drag ended
+                if motion_pos is not None:
+                    self.dispatch(pygame.MOUSEMOTION, motion_pos)
+                    motion_pos = None
+                self.dispatch(event.type, event.pos)
+        
+        if motion_pos is not None:
+            self.dispatch(pygame.MOUSEMOTION, motion_pos)
+            
+    def late_latch(self):
+        """
+        Move the dragged fly to the newest pointer position. Called right
+        before drawing, so the fly is drawn where the pointer is now rather
+        than where it was when the frame's events were read.
+        """
+        if not self.game.dragging_fly or self.game.game_state != PLAYING:
+            return False
+        if not pygame.mouse.get_focused():
+            return False  # No pointer state to read (e.g. events posted by a script)
+        pygame.event.pump()  # Refresh the pointer state; the events stay queued
+        self.dispatch(pygame.MOUSEMOTION, pygame.mouse.get_pos())
+        return True
+    
+    def dispatch(self, event_type, pos):
+        if self.camera and self.camera.pan_anchor and event_type == pygame.MOUSEMOTION:
+            self.camera.pan_to(self.map_pos(pos) if self.map_pos else pos)
+        handler = self.handlers[self.game.game_state].get(event_type)
+        if handler:
+            if self.map_pos:
+                pos = self.map_pos(pos)
+            if self.camera and self.game.game_state == PLAYING:
+                pos = self.camera.to_world(pos)
+            handler(pos)
+            
+    def camera_event(self, event):
+        camera = self.camera
+        if self.game.game_state == MENU:
+            return
+        if event.type == pygame.MULTIGESTURE:
+            if event.pinched:
+                pos = (event.x * SCREEN_WIDTH, event.y * SCREEN_HEIGHT)
+                camera.zoom_at(pos, 1 + event.d_dist * CAMERA_PINCH_GAIN)
+            return
+        if event.type == pygame.MOUSEWHEEL:
+            pos = pygame.mouse.get_pos()
+            camera.zoom_at(self.map_pos(pos) if self.map_pos else pos, CAMERA_ZOOM_STEP ** event.y)
+            return
+        if event.button == 3:
+            pos = self.map_pos(event.pos) if self.map_pos else event.pos
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                camera.start_pan(pos)
+            else:
+                camera.end_pan()
+            
+    def menu_mouse_down(self, mouse_pos):
+        if self.play_button.rect.collidepoint(mouse_pos):
+            self.game.finish_loading()
+            self.game.game_state = PLAYING
+            self.game.reset_game()
+        elif self.quit_button.rect.collidepoint(mouse_pos):
+            self.on_quit()
+            
+    def menu_mouse_motion(self, mouse_pos):
+        self.play_button.is_hovered(mouse_pos)
+        self.quit_button.is_hovered(mouse_pos)
+        
+    def game_over_mouse_down(self, mouse_pos):
+        if self.retry_button.rect.collidepoint(mouse_pos):
+            self.game.reset_game()
+        elif self.exit_button.rect.collidepoint(mouse_pos):
+            self.on_quit()
+            
+    def game_over_mouse_motion(self, mouse_pos):
+        self.retry_button.is_hovered(mouse_pos)
+        self.exit_button.is_hovered(mouse_pos)
 
 #----------------------------------------------------------------------
 # MAIN GAME LOOP
 #----------------------------------------------------------------------
 
+# Draw the background, particles and sprites of a Game or GameSnapshot through its render queue
+def draw_scene(screen, world):
+    queue = world.render_queue
+    
+    # Draw scrolling background, tinted for the time of day
+    lighting = world.lighting
+    lit = lighting.group_filter() if lighting else None
+    if lit:
+        queue.add_callback(functools.partial(world.background.draw, lighting=lighting), LAYER_BACKGROUND)
+    else:
+        queue.add_callback(world.background.draw, LAYER_BACKGROUND)
+    if world.ambient_particles:
+        queue.add_callback(world.ambient_particles.draw, LAYER_AMBIENT)
+    
+    # Draw all sprites
+    queue.add_group(world.all_sprites, LAYER_PET, lit)
+    queue.add_group(world.fly_sprites, LAYER_FLIES, lit)
+    queue.add_group(world.explosion_sprites, LAYER_EFFECTS)
+    if world.effect_particles:
+        queue.add_callback(world.effect_particles.draw, LAYER_EFFECTS)
+    
+    queue.flush(screen)
+
+# Draw the current game state to the screen
+def draw_screen(screen, game, logo_image, menu_buttons, game_over_buttons, camera=None):
+    # Clear the screen
+    screen.fill((0, 0, 0))
+    
+    if game.game_state == MENU:
+        # Draw menu over the background (scrolled once per frame in Game.update)
+        draw_menu(screen, logo_image, *menu_buttons, background=game.background,
+                  translucent_overlay=game.quality.translucent_overlay)
+    elif game.game_state == PLAYING:
+        # Draw game background and sprites
+        draw_world(screen, game, camera)
+        
+        # Draw game UI
+        draw_playing_ui(screen, game.pet_age, game.pet_hunger)
+    elif game.game_state == GAME_OVER:
+        # Draw game background
+        draw_world(screen, game, camera)
+        
+        # Draw game over screen
+        draw_game_over(screen, game.pet_age, *game_over_buttons,
+                       best_age=game.records.best_age if game.records else None,
+                       translucent_overlay=game.quality.translucent_overlay)
+
+# Draw the game world, through the camera if it is panned or zoomed
+def draw_world(screen, game, camera=None):
+    if camera and not camera.is_identity():
+        camera.draw(screen, game)
+    else:
+        game.draw(screen)
+
 def main():
+    timeline = StartupTimeline()
+    timeline.mark('import')
+    
     # Initialize Pygame
-    pygame.init()
+    if FAST_STARTUP:
+        # Only the subsystems the game uses; the mixer only if there is something to play
+        pygame.display.init()
+        pygame.font.init()
+        if find_sound_files():
+            pygame.mixer.pre_init(SOUND_FREQUENCY, -16, 2, SOUND_BUFFER)
+            pygame.mixer.init()
+    else:
+        pygame.mixer.pre_init(SOUND_FREQUENCY, -16, 2, SOUND_BUFFER)
+        pygame.init()
+    
+    # Apply GC thresholds, and start allocation profiling before anything is loaded
+    if GC_THRESHOLD:
+        gc.set_threshold(*(int(value) for value in GC_THRESHOLD.split(',')))
+    profiler = None
+    if ALLOC_PROFILE:
+        profiler = AllocationProfiler()
+        profiler.start()
+        atexit.register(profiler.close)
     
     # Set up the display
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    display = Display()
     pygame.display.set_caption("Reptile Pet Simulator")
-    clock = pygame.time.Clock()
+    clock = pygame.time.Clock()  # Also starts SDL's timer, which pygame.init() would otherwise do
+    timeline.mark('init')
     
     # Create UI elements
     play_button, quit_button = create_menu_buttons()
@@ -1175,90 +3887,144 @@ def main():
     
     # Create game instance
     game = Game()
-    game.load_assets()
+    game.display_stores = display.variant_stores
+    if FAST_STARTUP:
+        # Show the menu as soon as the background is in; the rest loads behind it
+        game.start_loading()
+    else:
+        game.load_assets()
+    
+    # Profile frames on the hotkey, SIGUSR1 or KOMODO_PROFILE=1
+    frame_profiler = FrameProfiler()
+    if PROFILE_ON_START:
+        frame_profiler.request()
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: frame_profiler.request())
+    
+    # Route input through the state-keyed handler table. In threaded mode the
+    # simulation thread handles input with its own buttons and camera
+    if THREADED_SIMULATION:
+        input_buttons = (create_menu_buttons(), create_game_over_buttons())
+        input_camera = Camera() if display.camera else None
+    else:
+        input_buttons = ((play_button, quit_button), (retry_button, exit_button))
+        input_camera = display.camera
+    input_handler = InputHandler(game, *input_buttons, display.to_logical, camera=input_camera,
+                                 on_profile=frame_profiler.request)
+    input_handler.install()
+    
+    # Export metrics if a file or port is configured
+    exporter = MetricsExporter(game.metrics.registry)
+    exporter.start()
+    
+    # Record vitals if a directory is configured
+    recorder = None
+    if VITALS_DIR:
+        if np is None:
+            logger.warning("KOMODO_VITALS_DIR is set but NumPy is not installed; vitals are not recorded")
+        else:
+            recorder = VitalsRecorder(VITALS_DIR)
+            atexit.register(recorder.close)
+    
+    # Capture gameplay if a directory is configured
+    capture = None
+    if CAPTURE_DIR:
+        capture = FrameCapture(CAPTURE_DIR, display.window.get_size(), metrics=game.metrics)
+        atexit.register(capture.close)
+    
+    # In threaded mode input and updates run on the simulation thread
+    simulation = None
+    if THREADED_SIMULATION:
+        if LATE_LATCH:
+            logger.info("Late latch is off in threaded mode; the simulation thread owns the dragged fly")
+        # Images are only loaded on the main thread, so finish loading first
+        game.finish_loading()
+        simulation = Simulation(game, input_handler)
+        simulation.start()
+        frame_profiler.add_thread(simulation.thread)
+    
+    # Lower quality when frames keep going over budget
+    watchdog = FrameBudgetWatchdog(game) if ADAPTIVE_QUALITY else None
+    
+    if display.camera:
+        game.metrics.registry.gauge('komodo_camera_culled_sprites', 'Sprites outside the camera view in the last frame.',
+                                    lambda: display.camera.culled)
+    
+    # Report input latency percentiles on exit
+    atexit.register(game.metrics.log_input_latency)
     
     # Main game loop
     running = True
+    pacer = FramePacer(clock, vsync=display.vsync)
+    atexit.register(pacer.log_cpu_report)
+    frame_start = time.perf_counter()
+    shown_input_time = None
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = event.pos
-                
-                if game.game_state == MENU:
-                    # Check menu buttons
-                    if play_button.rect.collidepoint(mouse_pos):
-                        game.game_state = PLAYING
-                        game.reset_game()
-                    elif quit_button.rect.collidepoint(mouse_pos):
-                        pygame.quit()
-                        exit()
-                
-                elif game.game_state == GAME_OVER:
-                    # Check game over buttons
-                    if retry_button.rect.collidepoint(mouse_pos):
-                        game.reset_game()
-                    elif exit_button.rect.collidepoint(mouse_pos):
-                        pygame.quit()
-                        exit()
-                
-                elif game.game_state == PLAYING:
-                    # Handle game play mouse down
-                    game.handle_mouse_down(mouse_pos)
+        latch_time = None
+        events = pacer.get_events()
+        work_start = time.perf_counter()  # Waiting for input on static screens is not work
+        if profiler:
+            profiler.frame_start()
+        profiling = frame_profiler.active
+        if profiling:
+            frame_profiler.frame_start()
+        if simulation:
+            if game.asset_watcher:
+                # Reload edited assets here, between simulation steps
+                with simulation.lock:
+                    game.asset_watcher.poll()
+            simulation.post(events, pacer.input_arrival)
+            if simulation.quit_requested:
+                simulation.stop()
+                quit_game()
+            world = simulation.latest()
+            world.show_ui(display.camera, (play_button, quit_button, retry_button, exit_button))
+        else:
+            if events:
+                game.input_time = pacer.input_arrival
+            input_handler.process(events)
             
-            elif event.type == pygame.MOUSEBUTTONUP:
-                # Handle game play mouse up
-                if game.game_state == PLAYING:
-                    game.handle_mouse_up(event.pos)
+            # Update game logic
+            game.update(pacer.frame_scale)  # (don't update scroll here)
+            world = game
             
-            elif event.type == pygame.MOUSEMOTION:
-                mouse_pos = event.pos
-                
-                # Update button hover states
-                if game.game_state == MENU:
-                    play_button.is_hovered(mouse_pos)
-                    quit_button.is_hovered(mouse_pos)
-                elif game.game_state == GAME_OVER:
-                    retry_button.is_hovered(mouse_pos)
-                    exit_button.is_hovered(mouse_pos)
-                
-                # Update dragged fly position
-                if game.game_state == PLAYING:
-                    game.handle_mouse_motion(mouse_pos)
-        
-        # Clear the screen
-        screen.fill((0, 0, 0))
-        
-        # Update game logic
-        game.update()  # (don't update scroll here)
+            # Draw a dragged fly at the pointer position as of now
+            if LATE_LATCH and input_handler.late_latch():
+                latch_time = time.perf_counter()
         
         # Draw game elements based on game state
-        if game.game_state == MENU:
-            # Update menu background scroll
-            game.update_background_scroll()
-            # Draw menu with scrolling background
-            draw_menu(screen, logo_image, play_button, quit_button, 
-                     background_image=game.background_image, 
-                     background_scroll=game.background_scroll)
-        elif game.game_state == PLAYING:
-            # Draw game background and sprites
-            game.draw(screen)
-            
-            # Draw game UI
-            draw_playing_ui(screen, game.pet_age, game.pet_hunger)
-        elif game.game_state == GAME_OVER:
-            # Draw game background
-            game.draw(screen)
-            
-            # Draw game over screen
-            draw_game_over(screen, game.pet_age, retry_button, exit_button)
+        display.render(world, logo_image, (play_button, quit_button), (retry_button, exit_button))
         
-        # Update the display
+        # Update the display. With vsync, flip() waits for the display, which is not frame work
+        flip_start = time.perf_counter()
         pygame.display.flip()
-        clock.tick(60)  # Limit the frame rate to 60 FPS
+        flip_wait = time.perf_counter() - flip_start if display.vsync else 0.0
+        if world.input_time != shown_input_time:
+            shown_input_time = world.input_time
+            game.metrics.input_latency.observe(time.perf_counter() - shown_input_time)
+        if latch_time is not None:
+            game.metrics.latched_input_latency.observe(time.perf_counter() - latch_time)
+        if capture:
+            capture.capture(display.window)
+        if profiling:
+            frame_profiler.frame_end()
+        game.metrics.frames.inc()
+        frame_work = time.perf_counter() - work_start - flip_wait
+        game.metrics.frame_work.observe(frame_work)
+        if watchdog:
+            watchdog.observe(frame_work)
+        pacer.tick(game.activity_level(), game.screen_name())
+        
+        if profiler:
+            profiler.frame_end()
+        frame_end = time.perf_counter()
+        game.metrics.frame_time.observe(frame_end - frame_start)
+        if recorder:
+            recorder.record(game, frame_end - frame_start)
+        frame_start = frame_end
+        
+        if not timeline.finished:
+            timeline.after_frame(game.assets_loaded)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file